@@ -0,0 +1,138 @@
+"""Scripted load scenarios against a running DevSocial API seeded by benchmarks.seed.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.loadtest --base-url http://localhost:8001 --scenario feed_scroll --concurrency 20 --duration 30
+    python -m benchmarks.loadtest --scenario all --output reports/$(git rev-parse --short HEAD).json
+
+Each scenario runs `concurrency` virtual users for `duration` seconds. Setup requests
+(logging the virtual users in, picking hot posts) are not measured.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.report import build_report, print_results, save_report, summarize
+from benchmarks.seed import BENCH_PASSWORD, HASHTAGS, SKILLS, bench_email
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ["feed_scroll", "login_burst", "like_storm", "search"]
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def results(self, prefix: str, elapsed: float) -> Dict[str, dict]:
+        names = set(self.latencies) | set(self.errors)
+        return {f"{prefix}.{n}": summarize(self.latencies[n], self.errors[n], elapsed) for n in names}
+
+async def login(client: httpx.AsyncClient, user_index: int) -> str:
+    response = await client.post("/api/auth/login", json={"email": bench_email(user_index), "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def login_many(client: httpx.AsyncClient, indices: List[int]) -> List[dict]:
+    tokens = await asyncio.gather(*(login(client, i) for i in indices))
+    return [{"Authorization": f"Bearer {t}"} for t in tokens]
+
+async def feed_scroll(client, recorder, rng, deadline, headers, pages, **_):
+    while time.perf_counter() < deadline:
+        for page in range(pages):
+            await recorder.request(client, "feed_page", "GET", "/api/posts/feed", params={"skip": page * 20, "limit": 20}, headers=headers)
+        await recorder.request(client, "explore_page", "GET", "/api/posts", params={"skip": rng.randrange(0, 5) * 20, "limit": 20}, headers=headers)
+        await recorder.request(client, "unread_count", "GET", "/api/notifications/unread-count", headers=headers)
+
+async def login_burst(client, recorder, rng, deadline, user_count, **_):
+    while time.perf_counter() < deadline:
+        payload = {"email": bench_email(rng.randrange(user_count)), "password": BENCH_PASSWORD}
+        await recorder.request(client, "login", "POST", "/api/auth/login", json=payload)
+
+async def like_storm(client, recorder, rng, deadline, headers, hot_posts, **_):
+    while time.perf_counter() < deadline:
+        post_id = rng.choice(hot_posts)
+        await recorder.request(client, "like_toggle", "POST", f"/api/posts/{post_id}/like", headers=headers)
+
+async def search(client, recorder, rng, deadline, headers, **_):
+    while time.perf_counter() < deadline:
+        tag = rng.choice(HASHTAGS)
+        await recorder.request(client, "search_posts", "GET", "/api/search/posts", params={"q": tag}, headers=headers)
+        await recorder.request(client, "hashtag_posts", "GET", f"/api/hashtags/{tag}/posts", headers=headers)
+        await recorder.request(client, "search_users", "GET", "/api/search/users", params={"q": rng.choice(SKILLS)})
+
+async def run_scenario(name: str, args) -> Dict[str, dict]:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        indices = rng.sample(range(args.users), min(args.concurrency, args.users))
+        all_headers = await login_many(client, indices) if name != "login_burst" else [{}] * len(indices)
+
+        hot_posts = []
+        if name == "like_storm":
+            response = await client.get("/api/posts", params={"limit": 50})
+            response.raise_for_status()
+            posts = sorted(response.json(), key=lambda p: p["likes_count"], reverse=True)
+            hot_posts = [p["id"] for p in posts[:args.hot_posts]]
+
+        recorder = Recorder()
+        scenario = globals()[name]
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            scenario(
+                client, recorder, random.Random(args.seed + i), deadline,
+                headers=headers, pages=args.pages, user_count=args.users, hot_posts=hot_posts,
+            )
+            for i, headers in enumerate(all_headers)
+        ))
+        return recorder.results(name, time.perf_counter() - start)
+
+async def run(args) -> Dict[str, dict]:
+    scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+    results = {}
+    for name in scenarios:
+        logger.info(f"Running {name} with {args.concurrency} virtual users for {args.duration}s")
+        results.update(await run_scenario(name, args))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Run load scenarios against a DevSocial API")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per scenario")
+    parser.add_argument("--users", type=int, default=1000, help="Number of users created by benchmarks.seed")
+    parser.add_argument("--pages", type=int, default=5, help="Feed pages scrolled per iteration")
+    parser.add_argument("--hot-posts", type=int, default=5, help="Number of posts targeted by like_storm")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write a JSON report for benchmarks.report comparisons")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    results = asyncio.run(run(args))
+    print_results(results)
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k != "output"}
+        save_report(build_report("loadtest", config, results), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Latency summaries and commit-to-commit comparison of benchmark reports.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.report baseline.json candidate.json --threshold 10
+"""
+import argparse
+import json
+import math
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Summarize latencies in seconds as milliseconds plus throughput."""
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+def bench(fn: Callable[[], object], iterations: int) -> dict:
+    """Time `iterations` sequential calls of fn after one warm-up call."""
+    fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, 0, sum(timings))
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+def build_report(kind: str, config: dict, results: Dict[str, dict]) -> dict:
+    return {
+        "kind": kind,
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": config,
+        "results": results,
+    }
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def print_results(results: Dict[str, dict]) -> None:
+    print(f"{'operation':<32}{'reqs':>8}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in sorted(results.items()):
+        print(f"{name:<32}{r['requests']:>8}{r['errors']:>6}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[str]:
+    """Print per-operation deltas and return the operations whose p95 regressed beyond threshold percent."""
+    regressions = []
+    print(f"baseline {baseline.get('revision')} -> candidate {candidate.get('revision')}")
+    print(f"{'operation':<32}{'p50 Δ%':>10}{'p95 Δ%':>10}{'p99 Δ%':>10}{'rps Δ%':>10}")
+    for name, new in sorted(candidate["results"].items()):
+        old = baseline["results"].get(name)
+        if not old:
+            print(f"{name:<32}{'(new)':>10}")
+            continue
+
+        def delta(key):
+            return (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+
+        p95 = delta("p95_ms")
+        print(f"{name:<32}{delta('p50_ms'):>10.1f}{p95:>10.1f}{delta('p99_ms'):>10.1f}{delta('throughput_rps'):>10.1f}")
+        if p95 > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Fail if any p95 regresses by more than this percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"p95 regressions above {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
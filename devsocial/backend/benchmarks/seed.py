@@ -0,0 +1,295 @@
+"""Generate a realistic synthetic DevSocial dataset for benchmarking.
+
+Follow counts, post counts, like counts and hashtag usage all follow power laws so
+that hot users and hot posts exist, as they do in production. Generation is
+deterministic for a given --seed.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.seed --mongo-url mongodb://localhost:27017 --db-name devsocial_bench --users 2000
+    python -m benchmarks.seed --mongomock --users 200
+
+Documents are written in the storage form the API writes (storage.py) and the API's
+indexes are created, so load tests run against what production serves. --legacy writes
+string ids and timestamps, as stored before migrations.storage_format, without indexes.
+
+Every generated user can log in with `user{i}@bench.devsocial.dev` and BENCH_PASSWORD.
+"""
+import argparse
+import itertools
+import logging
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List
+
+import bcrypt
+
+from migrations.create_indexes import create_indexes
+from storage import codec_for
+
+logger = logging.getLogger(__name__)
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL_DOMAIN = "bench.devsocial.dev"
+
+HASHTAGS = [
+    "python", "javascript", "react", "fastapi", "mongodb", "rust", "golang", "typescript",
+    "docker", "kubernetes", "devops", "machinelearning", "ai", "webdev", "backend", "frontend",
+    "algorithms", "datastructures", "opensource", "career", "testing", "performance", "linux",
+    "css", "nodejs", "django", "flutter", "aws", "security", "sql", "graphql", "100daysofcode",
+]
+SKILLS = [
+    "Python", "JavaScript", "TypeScript", "React", "Node.js", "Go", "Rust", "Java", "C++",
+    "MongoDB", "PostgreSQL", "Docker", "Kubernetes", "AWS", "FastAPI", "Django", "Flutter",
+]
+FIRST_NAMES = ["Asha", "Ravi", "Maya", "Leo", "Nina", "Omar", "Priya", "Sam", "Tara", "Yuki", "Zoe", "Arjun", "Ivy", "Kai"]
+LAST_NAMES = ["Sharma", "Chen", "Garcia", "Okafor", "Kim", "Novak", "Patel", "Silva", "Ito", "Berg", "Khan", "Rossi"]
+SENTENCES = [
+    "Just shipped a new feature and the tests are finally green.",
+    "Spent the whole day chasing an off-by-one error.",
+    "Here is a neat trick I learned today.",
+    "Anyone else think code review is the best way to learn?",
+    "Refactored this function and it is twice as fast now.",
+    "Debugging production at 2am builds character.",
+    "What is your favourite way to structure a new project?",
+    "Finally understood how the event loop works.",
+    "Reading the source of my favourite library was eye-opening.",
+    "Small PRs get reviewed faster. Change my mind.",
+]
+CODE_SNIPPETS = {
+    "python": "def fib(n):\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a\n",
+    "javascript": "const debounce = (fn, ms) => {\n  let t;\n  return (...args) => {\n    clearTimeout(t);\n    t = setTimeout(() => fn(...args), ms);\n  };\n};\n",
+    "go": "func reverse(s string) string {\n\tr := []rune(s)\n\tfor i, j := 0, len(r)-1; i < j; i, j = i+1, j-1 {\n\t\tr[i], r[j] = r[j], r[i]\n\t}\n\treturn string(r)\n}\n",
+    "rust": "fn main() {\n    let v: Vec<i32> = (1..=10).filter(|x| x % 2 == 0).collect();\n    println!(\"{:?}\", v);\n}\n",
+    "sql": "SELECT user_id, COUNT(*) AS posts\nFROM posts\nGROUP BY user_id\nORDER BY posts DESC\nLIMIT 10;\n",
+}
+COMMENTS = [
+    "Great post!", "Thanks for sharing.", "This saved me hours.", "Nice trick, bookmarked.",
+    "Have you tried benchmarking it?", "Love this.", "Could you explain the second part?",
+]
+
+@dataclass
+class SeedConfig:
+    users: int = 1000
+    avg_following: int = 30
+    avg_posts: int = 8
+    avg_likes_per_post: int = 15
+    avg_comments_per_post: int = 3
+    days: int = 90
+    zipf_exponent: float = 1.1
+    seed: int = 42
+
+def bench_email(index: int) -> str:
+    return f"user{index}@{BENCH_EMAIL_DOMAIN}"
+
+def _zipf_weights(n: int, exponent: float) -> List[float]:
+    return [1.0 / (rank ** exponent) for rank in range(1, n + 1)]
+
+def _power_law_count(rng: random.Random, mean: float, cap: int) -> int:
+    # Pareto with alpha=2 has mean 2 * xm, so xm = mean / 2
+    return min(cap, int(rng.paretovariate(2.0) * mean / 2))
+
+def _timestamp(rng: random.Random, now: datetime, days: int) -> str:
+    return (now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat()
+
+def generate(config: SeedConfig) -> Dict[str, List[dict]]:
+    """Build every collection's documents in memory; nothing is written."""
+    rng = random.Random(config.seed)
+    now = datetime.now(timezone.utc)
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+    users = []
+    for i in range(config.users):
+        username = f"dev{i}"
+        users.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "username": username,
+            "email": bench_email(i),
+            "password": password_hash,
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "bio": rng.choice(SENTENCES),
+            "skills": rng.sample(SKILLS, rng.randint(1, 5)),
+            "avatar": f"https://api.dicebear.com/7.x/avataaars/svg?seed={username}",
+            "followers_count": 0,
+            "following_count": 0,
+            "posts_count": 0,
+            "created_at": _timestamp(rng, now, config.days * 2),
+        })
+
+    # Popularity rank is a random permutation so user index does not imply popularity
+    popularity = list(range(config.users))
+    rng.shuffle(popularity)
+    user_weights = [0.0] * config.users
+    for rank_weight, user_index in zip(_zipf_weights(config.users, config.zipf_exponent), popularity):
+        user_weights[user_index] = rank_weight
+    user_cum_weights = list(itertools.accumulate(user_weights))
+
+    follows, notifications = [], []
+    for i, user in enumerate(users):
+        wanted = _power_law_count(rng, config.avg_following, config.users - 1)
+        targets = set()
+        for j in rng.choices(range(config.users), cum_weights=user_cum_weights, k=wanted * 2):
+            if j != i:
+                targets.add(j)
+            if len(targets) >= wanted:
+                break
+        for j in targets:
+            target = users[j]
+            created_at = _timestamp(rng, now, config.days)
+            follows.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "follower_id": user["id"],
+                "following_id": target["id"],
+                "created_at": created_at,
+            })
+            user["following_count"] += 1
+            target["followers_count"] += 1
+            notifications.append(_notification(rng, target["id"], "follow", user, created_at))
+
+    posts = []
+    hashtag_weights = _zipf_weights(len(HASHTAGS), config.zipf_exponent)
+    for i, user in enumerate(users):
+        # Popular users post more; the most popular user has weight 1.0
+        mean = config.avg_posts * (0.5 + user_weights[i] * 4)
+        for _ in range(_power_law_count(rng, mean, 500)):
+            hashtags = list(dict.fromkeys(rng.choices(HASHTAGS, weights=hashtag_weights, k=rng.randint(0, 4))))
+            language = rng.choice(list(CODE_SNIPPETS)) if rng.random() < 0.4 else None
+            posts.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "user_id": user["id"],
+                "username": user["username"],
+                "user_avatar": user["avatar"],
+                "content": " ".join(rng.sample(SENTENCES, rng.randint(1, 3))) + "".join(f" #{h}" for h in hashtags),
+                "code_snippet": CODE_SNIPPETS[language] if language else None,
+                "language": language,
+                "media_url": None,
+                "media_type": None,
+                "hashtags": hashtags,
+                "likes_count": 0,
+                "comments_count": 0,
+                "shares_count": 0,
+                "created_at": _timestamp(rng, now, config.days),
+            })
+            user["posts_count"] += 1
+
+    likes, comments = [], []
+    for post in posts:
+        like_count = _power_law_count(rng, config.avg_likes_per_post, config.users - 1)
+        likers = set(rng.choices(range(config.users), cum_weights=user_cum_weights, k=like_count)) if like_count else set()
+        for j in likers:
+            liker = users[j]
+            created_at = _timestamp(rng, now, config.days)
+            likes.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "post_id": post["id"],
+                "user_id": liker["id"],
+                "created_at": created_at,
+            })
+            post["likes_count"] += 1
+            if liker["id"] != post["user_id"]:
+                notifications.append(_notification(rng, post["user_id"], "like", liker, created_at, post["id"]))
+
+        for _ in range(_power_law_count(rng, config.avg_comments_per_post, 200)):
+            commenter = users[rng.randrange(config.users)]
+            created_at = _timestamp(rng, now, config.days)
+            comments.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "post_id": post["id"],
+                "user_id": commenter["id"],
+                "username": commenter["username"],
+                "user_avatar": commenter["avatar"],
+                "content": rng.choice(COMMENTS),
+                "created_at": created_at,
+            })
+            post["comments_count"] += 1
+            if commenter["id"] != post["user_id"]:
+                notifications.append(_notification(rng, post["user_id"], "comment", commenter, created_at, post["id"]))
+
+    # Read state is a per-user watermark; most users have read most of their notifications
+    by_user: Dict[str, List[str]] = {}
+    for notification in notifications:
+        by_user.setdefault(notification["user_id"], []).append(notification["created_at"])
+    for user in users:
+        timestamps = sorted(by_user.get(user["id"], []))
+        read = int(len(timestamps) * rng.uniform(0.5, 1.0))
+        user["notifications_read_at"] = timestamps[read - 1] if read else None
+        user["unread_notifications"] = len(timestamps) - read
+
+    return {
+        "users": users,
+        "follows": follows,
+        "posts": posts,
+        "likes": likes,
+        "comments": comments,
+        "notifications": notifications,
+    }
+
+def _notification(rng: random.Random, user_id: str, kind: str, from_user: dict, created_at: str, post_id: str = None) -> dict:
+    doc = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "user_id": user_id,
+        "type": kind,
+        "from_user_id": from_user["id"],
+        "from_username": from_user["username"],
+        "created_at": created_at,
+    }
+    if post_id:
+        doc["post_id"] = post_id
+    return doc
+
+def write(db, data: Dict[str, List[dict]], drop: bool = True, batch_size: int = 5000, legacy: bool = False) -> None:
+    """Insert generated documents into a PyMongo-compatible database (pymongo or mongomock)."""
+    for name, docs in data.items():
+        collection = db[name]
+        if drop:
+            collection.drop()
+        codec = codec_for(name)
+        if codec is not None and not legacy:
+            docs = [codec.encode_document(doc) for doc in docs]
+        for start in range(0, len(docs), batch_size):
+            collection.insert_many(docs[start:start + batch_size], ordered=False)
+        logger.info(f"Seeded {len(docs)} {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a DevSocial database with synthetic data")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="devsocial_bench")
+    parser.add_argument("--mongomock", action="store_true", help="Seed an in-memory mongomock database (dry run)")
+    parser.add_argument("--no-drop", action="store_true", help="Append instead of replacing existing collections")
+    parser.add_argument("--legacy", action="store_true", help="Write string ids and timestamps and skip index creation")
+    parser.add_argument("--users", type=int, default=SeedConfig.users)
+    parser.add_argument("--avg-following", type=int, default=SeedConfig.avg_following)
+    parser.add_argument("--avg-posts", type=int, default=SeedConfig.avg_posts)
+    parser.add_argument("--avg-likes", type=int, default=SeedConfig.avg_likes_per_post)
+    parser.add_argument("--avg-comments", type=int, default=SeedConfig.avg_comments_per_post)
+    parser.add_argument("--days", type=int, default=SeedConfig.days)
+    parser.add_argument("--seed", type=int, default=SeedConfig.seed)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = SeedConfig(
+        users=args.users,
+        avg_following=args.avg_following,
+        avg_posts=args.avg_posts,
+        avg_likes_per_post=args.avg_likes,
+        avg_comments_per_post=args.avg_comments,
+        days=args.days,
+        seed=args.seed,
+    )
+    data = generate(config)
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_url)
+    db = client[args.db_name]
+    write(db, data, drop=not args.no_drop, legacy=args.legacy)
+    if not args.legacy:
+        create_indexes(db)
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Serialization time per page: Pydantic + response_model path vs the fast row path.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.serialization --page-sizes 20 50 100 --iterations 200 --output serialization.json
+"""
+import argparse
+import gzip
+import json
+import os
+from typing import Dict, List
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'devsocial_bench')
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import serialization
+from benchmarks.report import bench, build_report, print_results, save_report
+from benchmarks.seed import SeedConfig, generate
+from server import POST_DEFAULTS, PostResponse
+
+POST_LIST = TypeAdapter(List[PostResponse])
+
+def pydantic_path(posts: List[dict]) -> bytes:
+    """What the endpoints did before: a model per row, response_model re-validation, stdlib json."""
+    models = [PostResponse(**post, is_liked=False) for post in posts]
+    validated = POST_LIST.validate_python(models)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+def fast_path(posts: List[dict], fields=None) -> bytes:
+    rows = serialization.project_rows(posts, POST_DEFAULTS, fields)
+    if fields is None:
+        for row in rows:
+            row["is_liked"] = False
+    return serialization.dumps(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list-response serialization")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 50, 100])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", help="Write a JSON report for benchmarks.report comparisons")
+    args = parser.parse_args()
+
+    posts = generate(SeedConfig(users=300, avg_posts=20, seed=7))["posts"]
+    sparse = serialization.parse_fields("content,username,user_avatar,hashtags,likes_count,comments_count,created_at", PostResponse)
+
+    results: Dict[str, dict] = {}
+    sizes: Dict[str, dict] = {}
+    for size in args.page_sizes:
+        page = posts[:size]
+        cases = {
+            "pydantic": lambda: pydantic_path(page),
+            "fast": lambda: fast_path(page),
+            "fast_sparse": lambda: fast_path(page, sparse),
+        }
+        for name, fn in cases.items():
+            results[f"page{size}.{name}"] = bench(fn, args.iterations)
+
+        body = fast_path(page)
+        results[f"page{size}.gzip"] = bench(lambda: gzip.compress(body, compresslevel=6), args.iterations)
+        sizes[f"page{size}"] = {
+            "raw_bytes": len(body),
+            "sparse_bytes": len(fast_path(page, sparse)),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+        }
+        if serialization.brotli is not None:
+            brotli = serialization.brotli
+            results[f"page{size}.brotli"] = bench(lambda: brotli.compress(body, quality=4), args.iterations)
+            sizes[f"page{size}"]["brotli_bytes"] = len(brotli.compress(body, quality=4))
+
+    print_results(results)
+    for page, page_sizes in sizes.items():
+        print(page, page_sizes)
+    if args.output:
+        config = {"page_sizes": args.page_sizes, "iterations": args.iterations, "orjson": serialization.orjson is not None}
+        report = build_report("serialization", config, results)
+        report["payload_sizes"] = sizes
+        save_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Startup-time benchmark: import-to-ready latency of the API in fresh processes.
+
+Each run spawns a new interpreter that imports `server`, builds the app and runs the
+lifespan startup (client creation, warm-up ping, index checks). Defaults to the
+in-memory data backend so no MongoDB is needed; pass --mongo-url to measure against
+a real server.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.startup --runs 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.report import build_report, print_results, save_report, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import server
+t1 = time.perf_counter()
+app = server.create_app()
+t2 = time.perf_counter()
+
+async def start():
+    async with app.router.lifespan_context(app):
+        t3 = time.perf_counter()
+    return t3
+
+t3 = asyncio.run(start())
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "lifespan": t3 - t2, "import_to_ready": t3 - t0}))
+"""
+
+def run_once(env: dict) -> dict:
+    start = time.perf_counter()
+    output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env)
+    phases = json.loads(output.decode().strip().splitlines()[-1])
+    phases["process_total"] = time.perf_counter() - start
+    return phases
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import-to-ready latency")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--mongo-url", help="Use a real MongoDB instead of the in-memory backend")
+    parser.add_argument("--db-name", default="devsocial_bench")
+    parser.add_argument("--output", help="Write a JSON report for benchmarks.report comparisons")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DB_NAME=args.db_name, METRICS_ENABLED=os.environ.get("METRICS_ENABLED", "true"))
+    if args.mongo_url:
+        env.update(MONGO_URL=args.mongo_url, DATA_BACKEND="mongo")
+    else:
+        env.update(DATA_BACKEND="memory")
+
+    timings = defaultdict(list)
+    for _ in range(args.runs):
+        for phase, seconds in run_once(env).items():
+            timings[phase].append(seconds)
+
+    results = {f"startup.{phase}": summarize(values, 0, sum(values)) for phase, values in timings.items()}
+    print_results(results)
+    if args.output:
+        config = {"runs": args.runs, "backend": env["DATA_BACKEND"]}
+        save_report(build_report("startup", config, results), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Index size and query latency: legacy string ids/timestamps vs native BSON storage form.
+
+Seeds the same synthetic dataset into two databases on a real MongoDB, converts one
+with migrations.storage_format, builds the production indexes on both and compares
+index sizes and the latency of the queries the API issues most.
+
+Usage (from devsocial/backend):
+    python -m benchmarks.storage_format --mongo-url mongodb://localhost:27017 --users 2000 --output storage.json
+"""
+import argparse
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+
+from pymongo import DESCENDING, MongoClient
+
+from benchmarks.report import bench, build_report, print_results, save_report
+from benchmarks.seed import SeedConfig, generate, write
+from migrations.create_indexes import create_indexes
+from migrations.storage_format import migrate
+from storage import CODECS
+
+logger = logging.getLogger(__name__)
+
+def build(client: MongoClient, name: str, data: dict, native: bool):
+    db = client[name]
+    write(db, {k: [dict(doc) for doc in docs] for k, docs in data.items()}, legacy=True)
+    if native:
+        migrate(db, batch_size=5000)
+    create_indexes(db)
+    return db
+
+def index_sizes(db) -> Dict[str, dict]:
+    sizes = {}
+    for collection in CODECS:
+        stats = db.command("collStats", collection)
+        sizes[collection] = {"data_bytes": stats["size"], "index_bytes": stats["totalIndexSize"], "indexes": stats["indexSizes"]}
+    return sizes
+
+def query_suite(db, native: bool, post_ids, user_ids, iterations: int, rng: random.Random) -> Dict[str, dict]:
+    codec = CODECS["posts"]
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+    since_value = since if native else since.isoformat()
+
+    def ids(values):
+        return [codec.encode_value("id", v) for v in values] if native else list(values)
+
+    return {
+        "latest_page": bench(lambda: list(db.posts.find({}, {"_id": 0}).sort("created_at", DESCENDING).skip(rng.randrange(0, 10) * 20).limit(20)), iterations),
+        "user_timeline": bench(lambda: list(db.posts.find({"user_id": rng.choice(user_ids)}, {"_id": 0}).sort("created_at", DESCENDING).limit(20)), iterations),
+        "last_7_days_count": bench(lambda: db.posts.count_documents({"created_at": {"$gte": since_value}}), iterations),
+        "batch_lookup_50": bench(lambda: list(db.posts.find({"id": {"$in": ids(rng.sample(post_ids, 50))}}, {"_id": 0})), iterations),
+        "comments_for_post": bench(lambda: list(db.comments.find({"post_id": ids([rng.choice(post_ids)])[0]}, {"_id": 0}).sort("created_at", 1).limit(50)), iterations),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and native storage formats")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-prefix", default="devsocial_storage_bench")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark databases afterwards")
+    parser.add_argument("--output", help="Write a JSON report for benchmarks.report comparisons")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    data = generate(SeedConfig(users=args.users, seed=args.seed))
+    post_ids = [p["id"] for p in data["posts"]]
+    user_ids = [u["id"] for u in data["users"]]
+
+    client = MongoClient(args.mongo_url, uuidRepresentation="standard", tz_aware=True)
+    results, sizes = {}, {}
+    for label, native in (("legacy", False), ("native", True)):
+        name = f"{args.db_prefix}_{label}"
+        db = build(client, name, data, native)
+        sizes[label] = index_sizes(db)
+        for query, summary in query_suite(db, native, post_ids, user_ids, args.iterations, random.Random(args.seed)).items():
+            results[f"{label}.{query}"] = summary
+        if not args.keep:
+            client.drop_database(name)
+    client.close()
+
+    print_results(results)
+    for label, collections in sizes.items():
+        for collection, size in collections.items():
+            print(f"{label:<8}{collection:<16}data {size['data_bytes']:>12}  indexes {size['index_bytes']:>12}")
+    if args.output:
+        report = build_report("storage_format", {"users": args.users, "iterations": args.iterations}, results)
+        report["sizes"] = sizes
+        save_report(report, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""In-process async stand-in for Motor, backed by mongomock.
+
+Only the surface the handlers use is adapted: awaitable collection methods and
+chainable cursors with `to_list`. Server-side deadlines are accepted and ignored.
+"""
+import mongomock
+
+IGNORED_KWARGS = ("max_time_ms", "maxTimeMS")
+
+def _strip(kwargs: dict) -> dict:
+    for name in IGNORED_KWARGS:
+        kwargs.pop(name, None)
+    return kwargs
+
+class FakeCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count: int):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._cursor:
+            yield doc
+
+class FakeCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return FakeCursor(self._collection.find(*args, **_strip(kwargs)))
+
+    def aggregate(self, pipeline, **kwargs):
+        return FakeCursor(self._collection.aggregate(pipeline, **_strip(kwargs)))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return method(*args, **_strip(kwargs))
+
+        return call
+
+class FakeDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return FakeCollection(self._database[name])
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, *args, **kwargs):
+        return self._database.command(*args, **kwargs)
+
+class FakeMongoClient:
+    def __init__(self):
+        self._client = mongomock.MongoClient()
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        return FakeDatabase(self._client[name])
+
+    def get_database(self, name: str, **kwargs) -> FakeDatabase:
+        return self[name]
+
+    def close(self) -> None:
+        self._client.close()
@@ -0,0 +1,31 @@
+"""Multi-process launcher for the DevSocial API.
+
+Usage (from devsocial/backend):
+    gunicorn -c gunicorn.conf.py server:app
+
+The app module is imported once in the master (preload_app) and workers are forked
+from it, so FastAPI, Pydantic models and routes are built a single time and shared
+copy-on-write. Importing `server` opens no sockets and starts no threads; each worker
+creates its own Mongo client in the lifespan handler after the fork. The LLM stack is
+imported lazily by whichever worker first serves an AI request.
+
+Metrics are per process: /api/metrics reports the worker that served the scrape.
+
+Environment:
+    PORT               listen port (default 8001)
+    WEB_CONCURRENCY    number of workers (default: CPU count)
+    GUNICORN_TIMEOUT   seconds before a silent worker is restarted (default 60)
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers occasionally to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = 1000
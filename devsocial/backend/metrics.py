@@ -0,0 +1,280 @@
+"""In-process request, database and AI instrumentation exported in Prometheus text format."""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+AI_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# ==================== METRIC TYPES ====================
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "devsocial_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+HTTP_REQUEST_DB_COMMANDS = REGISTRY.register(Histogram(
+    "devsocial_http_request_db_commands", "MongoDB commands issued per HTTP request",
+    ("method", "route"), buckets=COUNT_BUCKETS,
+))
+HTTP_REQUEST_DB_SECONDS = REGISTRY.register(Histogram(
+    "devsocial_http_request_db_seconds", "Time spent in MongoDB commands per HTTP request",
+    ("method", "route"),
+))
+DB_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "devsocial_db_command_duration_seconds", "MongoDB command latency by collection",
+    ("collection", "command"),
+))
+DB_COMMAND_ERRORS = REGISTRY.register(Counter(
+    "devsocial_db_command_errors_total", "Failed MongoDB commands by collection",
+    ("collection", "command"),
+))
+AI_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "devsocial_ai_request_duration_seconds", "LLM call latency by operation",
+    ("operation",), buckets=AI_LATENCY_BUCKETS,
+))
+AI_REQUEST_ERRORS = REGISTRY.register(Counter(
+    "devsocial_ai_request_errors_total", "Failed LLM calls by operation",
+    ("operation",),
+))
+EVENT_LOOP_LAG = REGISTRY.register(Gauge(
+    "devsocial_event_loop_lag_seconds", "Most recent event loop scheduling delay",
+))
+EVENT_LOOP_LAG_HISTOGRAM = REGISTRY.register(Histogram(
+    "devsocial_event_loop_lag_distribution_seconds", "Event loop scheduling delay distribution",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+
+# ==================== PER-REQUEST DATABASE TRACKING ====================
+
+class RequestStats:
+    """Mongo commands issued while serving a single request."""
+
+    __slots__ = ("commands", "db_seconds", "queries", "keep_queries")
+
+    def __init__(self, keep_queries: bool = False):
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.queries: List[Tuple[str, str, float]] = []
+        self.keep_queries = keep_queries
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("devsocial_request_stats", default=None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts commands and time per collection and attributes them to the current request.
+
+    Motor runs PyMongo on executor threads with a copy of the caller's context, so the
+    RequestStats object set by the middleware is visible here and can be mutated in place.
+    """
+
+    def __init__(self):
+        self._pending: Dict[tuple, Tuple[str, str]] = {}
+
+    def started(self, event):
+        name = event.command_name
+        target = event.command.get(name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "")
+        self._pending[(event.connection_id, event.request_id)] = (name, collection)
+
+    def _finish(self, event, failed: bool):
+        name, collection = self._pending.pop((event.connection_id, event.request_id), (event.command_name, ""))
+        seconds = event.duration_micros / 1_000_000
+        DB_COMMAND_DURATION.observe(seconds, collection=collection, command=name)
+        if failed:
+            DB_COMMAND_ERRORS.inc(collection=collection, command=name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.db_seconds += seconds
+            if stats.keep_queries:
+                stats.queries.append((name, collection, seconds))
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+# ==================== HTTP MIDDLEWARE ====================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and database usage."""
+
+    def __init__(self, app, slow_request_ms: float = 0, skip_paths=("/api/metrics",)):
+        self.app = app
+        self.slow_request_seconds = slow_request_ms / 1000 if slow_request_ms else 0
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        stats = RequestStats(keep_queries=bool(self.slow_request_seconds))
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=route_path, status=status["code"])
+            HTTP_REQUEST_DB_COMMANDS.observe(stats.commands, method=method, route=route_path)
+            HTTP_REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route_path)
+            if self.slow_request_seconds and elapsed >= self.slow_request_seconds:
+                queries = ", ".join(f"{c}:{coll} {s * 1000:.1f}ms" for c, coll, s in stats.queries)
+                logger.warning(
+                    f"Slow request {method} {route_path} -> {status['code']} in {elapsed * 1000:.1f}ms "
+                    f"({stats.commands} db commands, {stats.db_seconds * 1000:.1f}ms): [{queries}]"
+                )
+
+# ==================== AI CALLS ====================
+
+class track_ai_call:
+    """Async context manager timing an LLM call and counting failures."""
+
+    __slots__ = ("operation", "_start")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+
+    async def __aenter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        AI_REQUEST_DURATION.observe(time.perf_counter() - self._start, operation=self.operation)
+        if exc_type is not None:
+            AI_REQUEST_ERRORS.inc(operation=self.operation)
+        return False
+
+# ==================== EVENT LOOP LAG ====================
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sleep for `interval` repeatedly and record how late the loop woke us up."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,48 @@
+"""Create the indexes the API relies on (repository.INDEXES).
+
+Run once per deploy that changes INDEXES, before rolling out the new workers. Building
+an index on a large collection can take minutes, which is why the API only checks at
+startup that the indexes exist and logs a warning for missing ones. Already existing
+indexes are left alone, so it is safe to re-run.
+
+Usage (from devsocial/backend):
+    python -m migrations.create_indexes --mongo-url mongodb://localhost:27017 --db-name devsocial
+"""
+import argparse
+import logging
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from repository import INDEXES
+
+logger = logging.getLogger(__name__)
+
+def create_indexes(db) -> int:
+    """Create every index in INDEXES; returns the number of collections that failed."""
+    failed = 0
+    for name, indexes in INDEXES.items():
+        try:
+            created = db[name].create_indexes(indexes)
+            logger.info(f"{name}: {', '.join(created)}")
+        except PyMongoError as e:
+            # Typically existing data violating a unique index; the other collections still get theirs
+            logger.error(f"Could not create indexes on {name}: {e}")
+            failed += 1
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the indexes used by the API")
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--db-name", required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    client = MongoClient(args.mongo_url)
+    failed = create_indexes(client[args.db_name])
+    client.close()
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Move notification read state from per-document `read` flags to per-user watermarks.
+
+For each user the watermark (`notifications_read_at`) is the newest notification that
+precedes the oldest unread one, so every notification that was unread stays unread.
+`unread_notifications` is set to the number of notifications after the watermark.
+
+Run it right after deploying the watermark code. Users that already have a watermark
+field (migrated earlier, registered or marked notifications read on the new code) are
+skipped, so it is safe to re-run; --force recomputes everyone from the `read` flags.
+Everyone else gets both fields recomputed, including an `unread_notifications` counter
+the new code may already have started incrementing. Notifications created by the new
+code carry no flag and are treated as unread. The `read` flags are left in place unless
+--drop-read-flags is given.
+
+Notification timestamps may be in either storage form (see storage.py); the watermark
+is always written as a BSON datetime, the form create_notification compares against.
+
+Usage (from devsocial/backend):
+    python -m migrations.notification_watermark --mongo-url mongodb://localhost:27017 --db-name devsocial
+"""
+import argparse
+import logging
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional, Tuple
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+from storage import CODECS
+
+logger = logging.getLogger(__name__)
+
+def as_datetime(value) -> Optional[datetime]:
+    """A `created_at` in either storage form as an aware datetime, or None if unparseable."""
+    value = CODECS["notifications"].encode_value("created_at", value)
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def user_watermark(notifications: List[Tuple[datetime, bool]]) -> Tuple[Optional[datetime], int]:
+    """Return (notifications_read_at, unread_count) from one user's (created_at, read) pairs."""
+    unread = [created_at for created_at, read in notifications if not read]
+    if not unread:
+        return max(created_at for created_at, _ in notifications), 0
+    oldest_unread = min(unread)
+    read_before = [created_at for created_at, _ in notifications if created_at < oldest_unread]
+    if not read_before:
+        return None, len(notifications)
+    read_at = max(read_before)
+    return read_at, sum(1 for created_at, _ in notifications if created_at > read_at)
+
+def migrate(db, drop_read_flags: bool = False, force: bool = False, batch_size: int = 500) -> int:
+    notifications = db.notifications
+    done = set() if force else set(db.users.distinct("id", {"notifications_read_at": {"$exists": True}}))
+    codec = CODECS["users"]
+    # Timestamps are compared in Python: while migrations.storage_format runs, or once new
+    # notifications are written, `created_at` holds both strings and BSON datetimes, which
+    # the server would order by type rather than by time.
+    cursor = notifications.find({}, {"_id": 0, "user_id": 1, "created_at": 1, "read": 1}).sort("user_id", ASCENDING)
+    updates = []
+    migrated = 0
+    for user_id, group in groupby(cursor, key=itemgetter("user_id")):
+        if user_id in done:
+            continue
+        # Notifications created by the new code have no flag and count as unread
+        timestamps = [(as_datetime(n["created_at"]), n.get("read") is True) for n in group]
+        timestamps = [(created_at, read) for created_at, read in timestamps if created_at is not None]
+        if not timestamps:
+            continue
+        read_at, unread = user_watermark(timestamps)
+        updates.append(UpdateOne(
+            {"id": user_id},
+            codec.encode_update({"$set": {"notifications_read_at": read_at, "unread_notifications": unread}}),
+        ))
+        if len(updates) >= batch_size:
+            migrated += db.users.bulk_write(updates, ordered=False).matched_count
+            updates = []
+    if updates:
+        migrated += db.users.bulk_write(updates, ordered=False).matched_count
+
+    # Users without any notifications
+    db.users.update_many(
+        {"notifications_read_at": {"$exists": False}},
+        {"$set": {"notifications_read_at": None, "unread_notifications": 0}},
+    )
+    if drop_read_flags:
+        notifications.update_many({"read": {"$exists": True}}, {"$unset": {"read": ""}})
+    logger.info(f"Migrated notification read state for {migrated} users")
+    return migrated
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate notification read flags to per-user watermarks")
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--db-name", required=True)
+    parser.add_argument("--force", action="store_true", help="Recompute users that already have a watermark")
+    parser.add_argument("--drop-read-flags", action="store_true", help="Remove the obsolete per-notification read flags")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    client = MongoClient(args.mongo_url, uuidRepresentation="standard", tz_aware=True)
+    migrate(client[args.db_name], drop_read_flags=args.drop_read_flags, force=args.force)
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Online migration of ids and timestamps to their native storage form (see storage.py).
+
+Converts, in place and in small batches:
+    posts.id, posts.created_at
+    comments.id, comments.post_id, comments.created_at
+    notifications.id, notifications.post_id, notifications.created_at
+    likes.post_id
+    users.notifications_read_at
+
+Existing UUID values are kept, only their encoding changes, so API ids are unchanged.
+Documents are converted newest first: BSON sorts every datetime after every string, so
+`sort("created_at", -1)` keeps returning a correct order while both forms coexist.
+The API keeps matching ids in both forms until STORAGE_LEGACY_READS=false is set, which
+should only be done once this tool reports nothing left to convert. Safe to re-run.
+It can run before or after migrations.notification_watermark.
+
+Usage (from devsocial/backend):
+    python -m migrations.storage_format --mongo-url mongodb://localhost:27017 --db-name devsocial
+    python -m migrations.storage_format --mongo-url ... --db-name ... --dry-run
+"""
+import argparse
+import logging
+import time
+
+from pymongo import DESCENDING, MongoClient, UpdateOne
+
+from storage import CODECS
+
+logger = logging.getLogger(__name__)
+
+def legacy_filter(fields) -> dict:
+    return {"$or": [{field: {"$type": "string"}} for field in fields]}
+
+def migrate_collection(db, name: str, batch_size: int = 500, throttle_ms: int = 0, dry_run: bool = False) -> int:
+    codec = CODECS[name]
+    fields = sorted(codec.id_fields | codec.datetime_fields)
+    collection = db[name]
+    query = legacy_filter(fields)
+    if dry_run:
+        remaining = collection.count_documents(query)
+        logger.info(f"{name}: {remaining} documents to convert")
+        return remaining
+
+    sort = [("created_at", DESCENDING)] if "created_at" in fields else [("_id", DESCENDING)]
+    projection = {field: 1 for field in fields}
+    converted = 0
+    while True:
+        batch = list(collection.find(query, projection).sort(sort).limit(batch_size))
+        if not batch:
+            break
+        updates = []
+        for doc in batch:
+            encoded = codec.encode_document({f: doc[f] for f in fields if f in doc})
+            # Only touch fields still in legacy form; concurrent writers may have converted others
+            changes = {f: v for f, v in encoded.items() if isinstance(doc[f], str) and not isinstance(v, str)}
+            if changes:
+                updates.append(UpdateOne({"_id": doc["_id"], **{f: doc[f] for f in changes}}, {"$set": changes}))
+        if not updates:
+            # Only unparseable legacy values are left
+            logger.warning(f"{name}: {len(batch)} documents have values that cannot be converted")
+            break
+        converted += collection.bulk_write(updates, ordered=False).modified_count
+        logger.info(f"{name}: converted {converted} documents")
+        if throttle_ms:
+            time.sleep(throttle_ms / 1000)
+    return converted
+
+def migrate(db, batch_size: int = 500, throttle_ms: int = 0, dry_run: bool = False) -> dict:
+    return {
+        name: migrate_collection(db, name, batch_size=batch_size, throttle_ms=throttle_ms, dry_run=dry_run)
+        for name in CODECS
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert ids and timestamps to native BSON storage form")
+    parser.add_argument("--mongo-url", required=True)
+    parser.add_argument("--db-name", required=True)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--throttle-ms", type=int, default=0, help="Pause between batches to limit load on a live cluster")
+    parser.add_argument("--dry-run", action="store_true", help="Only count documents still in legacy form")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    client = MongoClient(args.mongo_url, uuidRepresentation="standard", tz_aware=True)
+    migrate(client[args.db_name], batch_size=args.batch_size, throttle_ms=args.throttle_ms, dry_run=args.dry_run)
+    client.close()
+
+if __name__ == "__main__":
+    main()
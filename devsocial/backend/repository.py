@@ -0,0 +1,326 @@
+"""Data access layer: owns the MongoDB client, pool tuning, query deadlines and read routing.
+
+Handlers pick a view for each query:
+    repo.primary    writes and read-your-writes (auth, viewer state, just-written data)
+    repo.secondary  listing reads that tolerate replication lag
+    repo.search     regex search, routed like `secondary` with a tighter deadline
+
+Every read issued through a view carries a default maxTimeMS so a runaway query is
+killed by the server instead of holding a pooled connection indefinitely. Views also
+convert ids and timestamps between their API and storage form (see storage.py).
+
+The client is created by `connect()`, not at construction, so the app can be imported
+(and preloaded before forking workers) without opening sockets or starting monitor threads.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from storage import DocumentCodec, codec_for
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+logger = logging.getLogger(__name__)
+
+# Indexes backing the handlers' queries, created by migrations.create_indexes and checked at startup
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "posts": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("hashtags", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "likes": [
+        IndexModel([("user_id", ASCENDING), ("post_id", ASCENDING)], unique=True),
+        IndexModel([("post_id", ASCENDING)]),
+    ],
+    "follows": [
+        IndexModel([("follower_id", ASCENDING), ("following_id", ASCENDING)], unique=True),
+        IndexModel([("following_id", ASCENDING)]),
+    ],
+    "comments": [
+        IndexModel([("post_id", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "notifications": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+}
+
+# Keyword each read method uses for its server-side deadline
+DEADLINE_KWARGS = {
+    "find": "max_time_ms",
+    "find_one": "max_time_ms",
+    "count_documents": "maxTimeMS",
+    "aggregate": "maxTimeMS",
+    "distinct": "maxTimeMS",
+}
+
+@dataclass
+class DataConfig:
+    mongo_url: str
+    db_name: str
+    backend: str = "mongo"  # "mongo" or "memory"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = 60000
+    wait_queue_timeout_ms: Optional[int] = 5000
+    server_selection_timeout_ms: int = 5000
+    compressors: Optional[str] = None  # e.g. "zstd,snappy,zlib"
+    read_timeout_ms: int = 5000
+    search_timeout_ms: int = 2000
+    listing_read_preference: str = "secondaryPreferred"
+    max_staleness_seconds: int = -1
+
+    @classmethod
+    def from_env(cls) -> "DataConfig":
+        env = os.environ
+        backend = env.get('DATA_BACKEND', 'mongo')
+        return cls(
+            mongo_url=env['MONGO_URL'] if backend == 'mongo' else env.get('MONGO_URL', ''),
+            db_name=env['DB_NAME'],
+            backend=backend,
+            max_pool_size=int(env.get('MONGO_MAX_POOL_SIZE', '100')),
+            min_pool_size=int(env.get('MONGO_MIN_POOL_SIZE', '0')),
+            max_idle_time_ms=int(env.get('MONGO_MAX_IDLE_TIME_MS', '60000')) or None,
+            wait_queue_timeout_ms=int(env.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')) or None,
+            server_selection_timeout_ms=int(env.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+            compressors=env.get('MONGO_COMPRESSORS') or None,
+            read_timeout_ms=int(env.get('MONGO_READ_TIMEOUT_MS', '5000')),
+            search_timeout_ms=int(env.get('MONGO_SEARCH_TIMEOUT_MS', '2000')),
+            listing_read_preference=env.get('MONGO_LISTING_READ_PREFERENCE', 'secondaryPreferred'),
+            max_staleness_seconds=int(env.get('MONGO_MAX_STALENESS_SECONDS', '-1')),
+        )
+
+    def listing_preference(self):
+        if self.listing_read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown read preference: {self.listing_read_preference}")
+        preference = READ_PREFERENCES[self.listing_read_preference]
+        if preference is Primary:
+            return Primary()
+        return preference(max_staleness=self.max_staleness_seconds)
+
+# ==================== VIEWS ====================
+
+class DecodingCursor:
+    """Cursor proxy decoding documents from storage form as they are read."""
+
+    __slots__ = ("_cursor", "_codec")
+
+    def __init__(self, cursor, codec: DocumentCodec):
+        self._cursor = cursor
+        self._codec = codec
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count: int):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        return [self._codec.decode(doc) for doc in await self._cursor.to_list(length)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        async for doc in self._cursor:
+            yield self._codec.decode(doc)
+
+class DeadlineCollection:
+    """Collection wrapper adding a default deadline to reads and storage-form conversion."""
+
+    __slots__ = ("_collection", "_max_time_ms", "_codec")
+
+    def __init__(self, collection, max_time_ms: Optional[int], codec: Optional[DocumentCodec] = None):
+        self._collection = collection
+        self._max_time_ms = max_time_ms
+        self._codec = codec
+
+    def _deadline(self, name: str, kwargs: dict) -> dict:
+        if self._max_time_ms:
+            kwargs.setdefault(DEADLINE_KWARGS[name], self._max_time_ms)
+        return kwargs
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in DEADLINE_KWARGS or not self._max_time_ms:
+            return attr
+
+        def with_deadline(*args, **kwargs):
+            return attr(*args, **self._deadline(name, kwargs))
+
+        return with_deadline
+
+    # Collections without a codec use the plain pass-through methods above
+
+    def find(self, filter=None, *args, **kwargs):
+        kwargs = self._deadline("find", kwargs)
+        if self._codec is None:
+            return self._collection.find(filter, *args, **kwargs)
+        return DecodingCursor(self._collection.find(self._codec.encode_filter(filter), *args, **kwargs), self._codec)
+
+    async def find_one(self, filter=None, *args, **kwargs):
+        kwargs = self._deadline("find_one", kwargs)
+        if self._codec is None:
+            return await self._collection.find_one(filter, *args, **kwargs)
+        return self._codec.decode(await self._collection.find_one(self._codec.encode_filter(filter), *args, **kwargs))
+
+    def count_documents(self, filter, **kwargs):
+        kwargs = self._deadline("count_documents", kwargs)
+        if self._codec is not None:
+            filter = self._codec.encode_filter(filter)
+        return self._collection.count_documents(filter, **kwargs)
+
+    def insert_one(self, document: dict, **kwargs):
+        if self._codec is not None:
+            document = self._codec.encode_document(document)
+        return self._collection.insert_one(document, **kwargs)
+
+    def insert_many(self, documents, **kwargs):
+        if self._codec is not None:
+            documents = [self._codec.encode_document(d) for d in documents]
+        return self._collection.insert_many(documents, **kwargs)
+
+    def _write(self, name: str, filter: dict, update: Optional[dict] = None, **kwargs):
+        method = getattr(self._collection, name)
+        if self._codec is not None:
+            filter = self._codec.encode_filter(filter)
+            if update is not None:
+                update = self._codec.encode_update(update)
+        if update is None:
+            return method(filter, **kwargs)
+        return method(filter, update, **kwargs)
+
+    def update_one(self, filter: dict, update: dict, **kwargs):
+        return self._write("update_one", filter, update, **kwargs)
+
+    def update_many(self, filter: dict, update: dict, **kwargs):
+        return self._write("update_many", filter, update, **kwargs)
+
+    def delete_one(self, filter: dict, **kwargs):
+        return self._write("delete_one", filter, **kwargs)
+
+    def delete_many(self, filter: dict, **kwargs):
+        return self._write("delete_many", filter, **kwargs)
+
+class DatabaseView:
+    """A database handle with a fixed read preference and default read deadline."""
+
+    def __init__(self, database, max_time_ms: Optional[int]):
+        self._database = database
+        self._max_time_ms = max_time_ms
+        self._collections = {}
+
+    def __getitem__(self, name: str) -> DeadlineCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = DeadlineCollection(self._database[name], self._max_time_ms, codec_for(name))
+        return collection
+
+    def __getattr__(self, name: str) -> DeadlineCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    @property
+    def database(self):
+        return self._database
+
+# ==================== REPOSITORY ====================
+
+class Repository:
+    def __init__(self, config: DataConfig):
+        self.config = config
+        self.client = None
+        self.primary: Optional[DatabaseView] = None
+        self.secondary: Optional[DatabaseView] = None
+        self.search: Optional[DatabaseView] = None
+
+    def connect(self, event_listeners: Sequence = ()) -> None:
+        config = self.config
+        if config.backend == "memory":
+            from fake_mongo import FakeMongoClient
+            self.client = FakeMongoClient()
+            primary_db = listing_db = self.client[config.db_name]
+        else:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            options = {
+                "maxPoolSize": config.max_pool_size,
+                "minPoolSize": config.min_pool_size,
+                "serverSelectionTimeoutMS": config.server_selection_timeout_ms,
+                # Ids are stored as BSON UUIDs and timestamps as BSON datetimes (storage.py)
+                "uuidRepresentation": "standard",
+                "tz_aware": True,
+                "event_listeners": list(event_listeners),
+            }
+            if config.max_idle_time_ms:
+                options["maxIdleTimeMS"] = config.max_idle_time_ms
+            if config.wait_queue_timeout_ms:
+                options["waitQueueTimeoutMS"] = config.wait_queue_timeout_ms
+            if config.compressors:
+                options["compressors"] = config.compressors
+            self.client = AsyncIOMotorClient(config.mongo_url, **options)
+            primary_db = self.client.get_database(config.db_name, read_preference=Primary())
+            listing_db = self.client.get_database(config.db_name, read_preference=config.listing_preference())
+
+        self.primary = DatabaseView(primary_db, config.read_timeout_ms)
+        self.secondary = DatabaseView(listing_db, config.read_timeout_ms)
+        self.search = DatabaseView(listing_db, config.search_timeout_ms)
+
+    async def warm_up(self) -> None:
+        """Fail fast if the server is unreachable and open the first pooled connection."""
+        if self.config.backend == "memory":
+            return
+        await self.client.admin.command("ping")
+
+    async def missing_indexes(self) -> List[str]:
+        """Names of INDEXES not present on the server, as "collection.index_name"."""
+        if self.config.backend == "memory":
+            return []
+        missing = []
+        for name, indexes in INDEXES.items():
+            existing = await self.primary[name].index_information()
+            missing.extend(f"{name}.{index.document['name']}" for index in indexes if index.document["name"] not in existing)
+        return missing
+
+    async def ensure_indexes(self) -> None:
+        for name, indexes in INDEXES.items():
+            try:
+                await self.primary[name].create_indexes(indexes)
+            except PyMongoError as e:
+                # Existing data violating a unique index should not keep the API down
+                logger.error(f"Could not ensure indexes on {name}: {e}")
+
+    @classmethod
+    def in_memory(cls, db_name: str = "devsocial_test") -> "Repository":
+        """In-process fake backed by mongomock, for tests and benchmarks."""
+        repo = cls(DataConfig(mongo_url="", db_name=db_name, backend="memory"))
+        repo.connect()
+        return repo
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
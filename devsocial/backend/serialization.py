@@ -0,0 +1,153 @@
+"""Fast response path for list endpoints built from our own database rows.
+
+Rows read back from MongoDB were validated when they were written, so list endpoints
+project them straight onto the response model's fields instead of building a Pydantic
+object per row and having FastAPI validate it again through `response_model`.
+"""
+import gzip
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# ==================== JSON ====================
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# ==================== ROW PROJECTION ====================
+
+def model_defaults(model: type[BaseModel]) -> Dict[str, Any]:
+    """Field name -> default for every field of `model`, in declaration order.
+
+    Required fields map to None; trusted rows always carry them. Mutable defaults are
+    shared between rows, which is fine because projected rows are only serialized.
+    """
+    return {
+        name: None if field.is_required() else field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+    }
+
+def parse_fields(fields: Optional[str], model: type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """Parse a `fields=a,b,c` sparse fieldset; `id` is always included."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id"] + requested))
+
+def mongo_projection(fields: Optional[Tuple[str, ...]], exclude: Iterable[str] = ()) -> Dict[str, int]:
+    """Projection fetching only the requested fields, or everything but `exclude`."""
+    if fields is None:
+        projection = {"_id": 0}
+        projection.update({name: 0 for name in exclude})
+        return projection
+    projection = {name: 1 for name in fields}
+    projection["_id"] = 0
+    return projection
+
+def project_rows(rows: Iterable[dict], defaults: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> List[dict]:
+    """Map database rows onto response fields without validation."""
+    names = fields if fields is not None else tuple(defaults)
+    return [{name: row.get(name, defaults[name]) for name in names} for row in rows]
+
+# ==================== COMPRESSION ====================
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if token:
+            accepted.add(token.lower())
+    return accepted
+
+class CompressionMiddleware:
+    """Brotli/gzip compression for single-chunk text responses above `minimum_size`.
+
+    Streaming responses (uploads served by StaticFiles) are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            if not compressible:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
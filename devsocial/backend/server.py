@@ -1,9 +1,9 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 import os
 import logging
 from pathlib import Path
@@ -13,17 +13,34 @@ import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 import asyncio
+import importlib
+from contextlib import asynccontextmanager
 import base64
+import metrics
+from pymongo.errors import ExecutionTimeout
+from repository import DataConfig, Repository
+from serialization import CompressionMiddleware, FastJSONResponse, model_defaults, mongo_projection, parse_fields, project_rows
+from storage import canonical_id, new_id, timestamp
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Instrumentation
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '0'))
+EVENT_LOOP_LAG_INTERVAL = float(os.environ.get('EVENT_LOOP_LAG_INTERVAL', '0.5'))
+
+# Batch lookups
+BATCH_MAX_IDS = int(os.environ.get('BATCH_MAX_IDS', '100'))
+
+# Response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+# MongoDB; each app owns a Repository, connected per worker by the lifespan handler.
+# Building indexes can outlast the worker boot timeout, so by default startup only checks
+# they exist; create them with `python -m migrations.create_indexes`.
+ENSURE_INDEXES = os.environ.get('ENSURE_INDEXES', 'false').lower() in ('1', 'true', 'yes')
 
 # JWT Config
 JWT_SECRET = os.environ.get('JWT_SECRET', 'devsocial-secret-key-2024')
@@ -33,12 +50,8 @@ JWT_EXPIRATION_HOURS = 24 * 7  # 1 week
 # Gemini API Key
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY', '')
 
-# Upload directory
+# Upload directory, created at startup
 UPLOAD_DIR = ROOT_DIR / 'uploads'
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-# Create the main app
-app = FastAPI(title="DevSocial API")
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -109,6 +122,19 @@ class PostResponse(BaseModel):
     is_liked: bool = False
     created_at: str
 
+class BatchLookup(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_IDS)
+
+class PostBatchItem(BaseModel):
+    id: str
+    found: bool
+    post: Optional[PostResponse] = None
+
+class UserBatchItem(BaseModel):
+    id: str
+    found: bool
+    user: Optional[UserProfile] = None
+
 class CommentCreate(BaseModel):
     content: str
 
@@ -140,8 +166,17 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user: UserProfile
 
+# Defaults used by the list endpoints' fast serialization path
+POST_DEFAULTS = model_defaults(PostResponse)
+USER_DEFAULTS = model_defaults(UserProfile)
+COMMENT_DEFAULTS = model_defaults(CommentResponse)
+FIELDS_DESCRIPTION = "Comma-separated sparse fieldset, e.g. id,content,likes_count"
+
 # ==================== HELPER FUNCTIONS ====================
 
+def get_repo(request: Request) -> Repository:
+    return request.app.state.repo
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
@@ -155,12 +190,12 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), repo: Repository = Depends(get_repo)) -> dict:
     try:
         token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("user_id")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        user = await repo.primary.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -169,22 +204,105 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))) -> Optional[dict]:
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)), repo: Repository = Depends(get_repo)) -> Optional[dict]:
     if not credentials:
         return None
     try:
         token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("user_id")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        user = await repo.primary.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
         return user
     except:
         return None
 
+async def get_liked_post_ids(repo: Repository, current_user: Optional[dict], post_ids: List[str]) -> set:
+    if not current_user or not post_ids:
+        return set()
+    likes = await repo.primary.likes.find(
+        {"user_id": current_user["id"], "post_id": {"$in": post_ids}},
+        {"_id": 0, "post_id": 1}
+    ).to_list(len(post_ids))
+    return {like["post_id"] for like in likes}
+
+async def post_rows(repo: Repository, posts: List[dict], current_user: Optional[dict], fields: Optional[tuple]) -> List[dict]:
+    rows = project_rows(posts, POST_DEFAULTS, fields)
+    if fields is None or "is_liked" in fields:
+        liked_ids = await get_liked_post_ids(repo, current_user, [p["id"] for p in posts])
+        for row in rows:
+            row["is_liked"] = row["id"] in liked_ids
+    return rows
+
+async def post_list_response(repo: Repository, posts: List[dict], current_user: Optional[dict], fields: Optional[tuple]) -> FastJSONResponse:
+    return FastJSONResponse(await post_rows(repo, posts, current_user, fields))
+
+def user_list_response(users: List[dict], fields: Optional[tuple]) -> FastJSONResponse:
+    return FastJSONResponse(project_rows(users, USER_DEFAULTS, fields))
+
+def user_projection(fields: Optional[tuple]) -> dict:
+    return mongo_projection(fields, exclude=["password"])
+
+def post_projection(fields: Optional[tuple]) -> dict:
+    # is_liked is computed per viewer, not stored
+    if fields is None:
+        return {"_id": 0}
+    return mongo_projection(tuple(f for f in fields if f != "is_liked"))
+
+async def create_notification(repo: Repository, user_id: str, kind: str, from_user: dict, post_id: Optional[str] = None) -> None:
+    notification_doc = {
+        "id": new_id(),
+        "user_id": user_id,
+        "type": kind,
+        "from_user_id": from_user["id"],
+        "from_username": from_user["username"],
+        "created_at": timestamp()
+    }
+    if post_id:
+        notification_doc["post_id"] = post_id
+    await repo.primary.notifications.insert_one(notification_doc)
+    # A mark-read racing with this insert may already have moved the watermark past it
+    await repo.primary.users.update_one(
+        {"id": user_id, "$or": [
+            {"notifications_read_at": None},
+            {"notifications_read_at": {"$lt": notification_doc["created_at"]}},
+        ]},
+        {"$inc": {"unread_notifications": 1}}
+    )
+
+def notification_is_read(notification: dict, read_at: Optional[str]) -> bool:
+    # Read state is derived from the user's watermark, not stored per notification
+    return read_at is not None and notification["created_at"] <= read_at
+
+def batch_items(ids: List[str], rows: List[dict], key: str) -> List[dict]:
+    """Order rows by the requested ids, marking ids that matched nothing as not found."""
+    by_id = {row["id"]: row for row in rows}
+    items = []
+    for i in ids:
+        # Rows carry canonical ids; match "{...}", upper-case or unhyphenated requests too
+        row = by_id.get(canonical_id(i))
+        items.append({"id": i, "found": row is not None, key: row})
+    return items
+
+_llm_chat_module = None
+
+async def load_llm_chat_module():
+    """Import the LLM stack on first use; it is by far the slowest import in the app."""
+    global _llm_chat_module
+    if _llm_chat_module is None:
+        # Import off the event loop so in-flight requests are not stalled
+        _llm_chat_module = await asyncio.to_thread(importlib.import_module, "emergentintegrations.llm.chat")
+    return _llm_chat_module
+
+async def send_ai_message(chat, prompt: str, operation: str) -> str:
+    llm = await load_llm_chat_module()
+    async with metrics.track_ai_call(operation):
+        return await chat.send_message(llm.UserMessage(text=prompt))
+
 async def get_ai_chat():
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=500, detail="AI service not configured")
-    chat = LlmChat(
+    llm = await load_llm_chat_module()
+    chat = llm.LlmChat(
         api_key=EMERGENT_LLM_KEY,
         session_id=str(uuid.uuid4()),
         system_message="You are a helpful AI assistant for developers."
@@ -195,9 +313,9 @@ async def get_ai_chat():
 # ==================== AUTH ROUTES ====================
 
 @api_router.post("/auth/register", response_model=TokenResponse)
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, repo: Repository = Depends(get_repo)):
     # Check if user exists
-    existing_user = await db.users.find_one({"$or": [{"email": user_data.email}, {"username": user_data.username}]})
+    existing_user = await repo.primary.users.find_one({"$or": [{"email": user_data.email}, {"username": user_data.username}]})
     if existing_user:
         raise HTTPException(status_code=400, detail="User with this email or username already exists")
     
@@ -214,10 +332,12 @@ async def register(user_data: UserCreate):
         "followers_count": 0,
         "following_count": 0,
         "posts_count": 0,
+        "unread_notifications": 0,
+        "notifications_read_at": None,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.users.insert_one(user_doc)
+    await repo.primary.users.insert_one(user_doc)
     
     token = create_token(user_id)
     user_doc.pop("password")
@@ -226,8 +346,8 @@ async def register(user_data: UserCreate):
     return TokenResponse(access_token=token, user=UserProfile(**user_doc))
 
 @api_router.post("/auth/login", response_model=TokenResponse)
-async def login(credentials: UserLogin):
-    user = await db.users.find_one({"email": credentials.email})
+async def login(credentials: UserLogin, repo: Repository = Depends(get_repo)):
+    user = await repo.primary.users.find_one({"email": credentials.email})
     if not user or not verify_password(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
@@ -243,48 +363,56 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 
 # ==================== USER ROUTES ====================
 
+@api_router.post("/users/batch", response_model=List[UserBatchItem])
+async def get_users_batch(lookup: BatchLookup, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, UserProfile)
+    unique_ids = list(dict.fromkeys(canonical_id(i) for i in lookup.ids))
+    users = await repo.secondary.users.find({"id": {"$in": unique_ids}}, user_projection(fields)).to_list(len(unique_ids))
+    rows = project_rows(users, USER_DEFAULTS, fields)
+    return FastJSONResponse(batch_items(lookup.ids, rows, "user"))
+
 @api_router.get("/users/{user_id}", response_model=UserProfile)
-async def get_user(user_id: str):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+async def get_user(user_id: str, repo: Repository = Depends(get_repo)):
+    user = await repo.secondary.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserProfile(**user)
 
 @api_router.get("/users/username/{username}", response_model=UserProfile)
-async def get_user_by_username(username: str):
-    user = await db.users.find_one({"username": username}, {"_id": 0, "password": 0})
+async def get_user_by_username(username: str, repo: Repository = Depends(get_repo)):
+    user = await repo.secondary.users.find_one({"username": username}, {"_id": 0, "password": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserProfile(**user)
 
 @api_router.put("/users/profile", response_model=UserProfile)
-async def update_profile(update_data: UserProfileUpdate, current_user: dict = Depends(get_current_user)):
+async def update_profile(update_data: UserProfileUpdate, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     if update_dict:
-        await db.users.update_one({"id": current_user["id"]}, {"$set": update_dict})
+        await repo.primary.users.update_one({"id": current_user["id"]}, {"$set": update_dict})
     
-    user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
+    user = await repo.primary.users.find_one({"id": current_user["id"]}, {"_id": 0, "password": 0})
     return UserProfile(**user)
 
 @api_router.post("/users/{user_id}/follow")
-async def follow_user(user_id: str, current_user: dict = Depends(get_current_user)):
+async def follow_user(user_id: str, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
     if user_id == current_user["id"]:
         raise HTTPException(status_code=400, detail="Cannot follow yourself")
     
-    target_user = await db.users.find_one({"id": user_id})
+    target_user = await repo.primary.users.find_one({"id": user_id})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    existing_follow = await db.follows.find_one({
+    existing_follow = await repo.primary.follows.find_one({
         "follower_id": current_user["id"],
         "following_id": user_id
     })
     
     if existing_follow:
         # Unfollow
-        await db.follows.delete_one({"follower_id": current_user["id"], "following_id": user_id})
-        await db.users.update_one({"id": current_user["id"]}, {"$inc": {"following_count": -1}})
-        await db.users.update_one({"id": user_id}, {"$inc": {"followers_count": -1}})
+        await repo.primary.follows.delete_one({"follower_id": current_user["id"], "following_id": user_id})
+        await repo.primary.users.update_one({"id": current_user["id"]}, {"$inc": {"following_count": -1}})
+        await repo.primary.users.update_one({"id": user_id}, {"$inc": {"followers_count": -1}})
         return {"status": "unfollowed"}
     else:
         # Follow
@@ -294,63 +422,56 @@ async def follow_user(user_id: str, current_user: dict = Depends(get_current_use
             "following_id": user_id,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.follows.insert_one(follow_doc)
-        await db.users.update_one({"id": current_user["id"]}, {"$inc": {"following_count": 1}})
-        await db.users.update_one({"id": user_id}, {"$inc": {"followers_count": 1}})
+        await repo.primary.follows.insert_one(follow_doc)
+        await repo.primary.users.update_one({"id": current_user["id"]}, {"$inc": {"following_count": 1}})
+        await repo.primary.users.update_one({"id": user_id}, {"$inc": {"followers_count": 1}})
         
-        # Create notification
-        notification_doc = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "type": "follow",
-            "from_user_id": current_user["id"],
-            "from_username": current_user["username"],
-            "read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.notifications.insert_one(notification_doc)
+        await create_notification(repo, user_id, "follow", current_user)
         
         return {"status": "followed"}
 
 @api_router.get("/users/{user_id}/is-following")
-async def is_following(user_id: str, current_user: dict = Depends(get_current_user)):
-    existing_follow = await db.follows.find_one({
+async def is_following(user_id: str, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    existing_follow = await repo.primary.follows.find_one({
         "follower_id": current_user["id"],
         "following_id": user_id
     })
     return {"is_following": existing_follow is not None}
 
 @api_router.get("/users/{user_id}/followers", response_model=List[UserProfile])
-async def get_followers(user_id: str, skip: int = 0, limit: int = 20):
-    follows = await db.follows.find({"following_id": user_id}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
+async def get_followers(user_id: str, skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, UserProfile)
+    follows = await repo.secondary.follows.find({"following_id": user_id}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
     follower_ids = [f["follower_id"] for f in follows]
-    users = await db.users.find({"id": {"$in": follower_ids}}, {"_id": 0, "password": 0}).to_list(len(follower_ids))
-    return [UserProfile(**u) for u in users]
+    users = await repo.secondary.users.find({"id": {"$in": follower_ids}}, user_projection(fields)).to_list(len(follower_ids))
+    return user_list_response(users, fields)
 
 @api_router.get("/users/{user_id}/following", response_model=List[UserProfile])
-async def get_following(user_id: str, skip: int = 0, limit: int = 20):
-    follows = await db.follows.find({"follower_id": user_id}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
+async def get_following(user_id: str, skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, UserProfile)
+    follows = await repo.secondary.follows.find({"follower_id": user_id}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
     following_ids = [f["following_id"] for f in follows]
-    users = await db.users.find({"id": {"$in": following_ids}}, {"_id": 0, "password": 0}).to_list(len(following_ids))
-    return [UserProfile(**u) for u in users]
+    users = await repo.secondary.users.find({"id": {"$in": following_ids}}, user_projection(fields)).to_list(len(following_ids))
+    return user_list_response(users, fields)
 
 @api_router.get("/search/users", response_model=List[UserProfile])
-async def search_users(q: str = Query(..., min_length=1), skip: int = 0, limit: int = 20):
-    users = await db.users.find(
+async def search_users(q: str = Query(..., min_length=1), skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, UserProfile)
+    users = await repo.search.users.find(
         {"$or": [
             {"username": {"$regex": q, "$options": "i"}},
             {"full_name": {"$regex": q, "$options": "i"}},
             {"skills": {"$regex": q, "$options": "i"}}
         ]},
-        {"_id": 0, "password": 0}
+        user_projection(fields)
     ).skip(skip).limit(limit).to_list(limit)
-    return [UserProfile(**u) for u in users]
+    return user_list_response(users, fields)
 
 # ==================== POST ROUTES ====================
 
 @api_router.post("/posts", response_model=PostResponse)
-async def create_post(post_data: PostCreate, current_user: dict = Depends(get_current_user)):
-    post_id = str(uuid.uuid4())
+async def create_post(post_data: PostCreate, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    post_id = new_id()
     post_doc = {
         "id": post_id,
         "user_id": current_user["id"],
@@ -365,103 +486,94 @@ async def create_post(post_data: PostCreate, current_user: dict = Depends(get_cu
         "likes_count": 0,
         "comments_count": 0,
         "shares_count": 0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": timestamp()
     }
     
-    await db.posts.insert_one(post_doc)
-    await db.users.update_one({"id": current_user["id"]}, {"$inc": {"posts_count": 1}})
+    await repo.primary.posts.insert_one(post_doc)
+    await repo.primary.users.update_one({"id": current_user["id"]}, {"$inc": {"posts_count": 1}})
     
     post_doc.pop("_id", None)
     return PostResponse(**post_doc, is_liked=False)
 
 @api_router.get("/posts", response_model=List[PostResponse])
-async def get_posts(skip: int = 0, limit: int = 20, current_user: Optional[dict] = Depends(get_optional_user)):
-    posts = await db.posts.find({}, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    result = []
-    for post in posts:
-        is_liked = False
-        if current_user:
-            like = await db.likes.find_one({"post_id": post["id"], "user_id": current_user["id"]})
-            is_liked = like is not None
-        result.append(PostResponse(**post, is_liked=is_liked))
-    
-    return result
+async def get_posts(skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
+    posts = await repo.secondary.posts.find({}, post_projection(fields)).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+
+    return await post_list_response(repo, posts, current_user, fields)
 
 @api_router.get("/posts/feed", response_model=List[PostResponse])
-async def get_feed(skip: int = 0, limit: int = 20, current_user: dict = Depends(get_current_user)):
+async def get_feed(skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
     # Get posts from users the current user follows
-    follows = await db.follows.find({"follower_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+    follows = await repo.primary.follows.find({"follower_id": current_user["id"]}, {"_id": 0}).to_list(1000)
     following_ids = [f["following_id"] for f in follows]
     following_ids.append(current_user["id"])  # Include own posts
     
-    posts = await db.posts.find(
+    posts = await repo.primary.posts.find(
         {"user_id": {"$in": following_ids}},
-        {"_id": 0}
+        post_projection(fields)
     ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    result = []
-    for post in posts:
-        like = await db.likes.find_one({"post_id": post["id"], "user_id": current_user["id"]})
-        is_liked = like is not None
-        result.append(PostResponse(**post, is_liked=is_liked))
-    
-    return result
+
+    return await post_list_response(repo, posts, current_user, fields)
+
+@api_router.post("/posts/batch", response_model=List[PostBatchItem])
+async def get_posts_batch(lookup: BatchLookup, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
+    unique_ids = list(dict.fromkeys(canonical_id(i) for i in lookup.ids))
+    posts = await repo.secondary.posts.find({"id": {"$in": unique_ids}}, post_projection(fields)).to_list(len(unique_ids))
+    rows = await post_rows(repo, posts, current_user, fields)
+    return FastJSONResponse(batch_items(lookup.ids, rows, "post"))
 
 @api_router.get("/posts/{post_id}", response_model=PostResponse)
-async def get_post(post_id: str, current_user: Optional[dict] = Depends(get_optional_user)):
-    post = await db.posts.find_one({"id": post_id}, {"_id": 0})
+async def get_post(post_id: str, current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    post = await repo.primary.posts.find_one({"id": post_id}, {"_id": 0})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     is_liked = False
     if current_user:
-        like = await db.likes.find_one({"post_id": post_id, "user_id": current_user["id"]})
+        like = await repo.primary.likes.find_one({"post_id": post_id, "user_id": current_user["id"]})
         is_liked = like is not None
     
     return PostResponse(**post, is_liked=is_liked)
 
 @api_router.get("/users/{user_id}/posts", response_model=List[PostResponse])
-async def get_user_posts(user_id: str, skip: int = 0, limit: int = 20, current_user: Optional[dict] = Depends(get_optional_user)):
-    posts = await db.posts.find({"user_id": user_id}, {"_id": 0}).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    result = []
-    for post in posts:
-        is_liked = False
-        if current_user:
-            like = await db.likes.find_one({"post_id": post["id"], "user_id": current_user["id"]})
-            is_liked = like is not None
-        result.append(PostResponse(**post, is_liked=is_liked))
-    
-    return result
+async def get_user_posts(user_id: str, skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
+    # Own profile reads from the primary so a just-created post is visible
+    view = repo.primary if current_user and current_user["id"] == user_id else repo.secondary
+    posts = await view.posts.find({"user_id": user_id}, post_projection(fields)).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+
+    return await post_list_response(repo, posts, current_user, fields)
 
 @api_router.delete("/posts/{post_id}")
-async def delete_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    post = await db.posts.find_one({"id": post_id})
+async def delete_post(post_id: str, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    post = await repo.primary.posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post["user_id"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
     
-    await db.posts.delete_one({"id": post_id})
-    await db.likes.delete_many({"post_id": post_id})
-    await db.comments.delete_many({"post_id": post_id})
-    await db.users.update_one({"id": current_user["id"]}, {"$inc": {"posts_count": -1}})
+    await repo.primary.posts.delete_one({"id": post_id})
+    await repo.primary.likes.delete_many({"post_id": post_id})
+    await repo.primary.comments.delete_many({"post_id": post_id})
+    await repo.primary.users.update_one({"id": current_user["id"]}, {"$inc": {"posts_count": -1}})
     
     return {"status": "deleted"}
 
 @api_router.post("/posts/{post_id}/like")
-async def like_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    post = await db.posts.find_one({"id": post_id})
+async def like_post(post_id: str, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    post = await repo.primary.posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    existing_like = await db.likes.find_one({"post_id": post_id, "user_id": current_user["id"]})
+    existing_like = await repo.primary.likes.find_one({"post_id": post_id, "user_id": current_user["id"]})
     
     if existing_like:
         # Unlike
-        await db.likes.delete_one({"post_id": post_id, "user_id": current_user["id"]})
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes_count": -1}})
+        await repo.primary.likes.delete_one({"post_id": post_id, "user_id": current_user["id"]})
+        await repo.primary.posts.update_one({"id": post_id}, {"$inc": {"likes_count": -1}})
         return {"status": "unliked", "likes_count": post["likes_count"] - 1}
     else:
         # Like
@@ -471,34 +583,24 @@ async def like_post(post_id: str, current_user: dict = Depends(get_current_user)
             "user_id": current_user["id"],
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.likes.insert_one(like_doc)
-        await db.posts.update_one({"id": post_id}, {"$inc": {"likes_count": 1}})
+        await repo.primary.likes.insert_one(like_doc)
+        await repo.primary.posts.update_one({"id": post_id}, {"$inc": {"likes_count": 1}})
         
         # Create notification if not own post
         if post["user_id"] != current_user["id"]:
-            notification_doc = {
-                "id": str(uuid.uuid4()),
-                "user_id": post["user_id"],
-                "type": "like",
-                "from_user_id": current_user["id"],
-                "from_username": current_user["username"],
-                "post_id": post_id,
-                "read": False,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            await db.notifications.insert_one(notification_doc)
+            await create_notification(repo, post["user_id"], "like", current_user, post_id)
         
         return {"status": "liked", "likes_count": post["likes_count"] + 1}
 
 # ==================== COMMENT ROUTES ====================
 
 @api_router.post("/posts/{post_id}/comments", response_model=CommentResponse)
-async def create_comment(post_id: str, comment_data: CommentCreate, current_user: dict = Depends(get_current_user)):
-    post = await db.posts.find_one({"id": post_id})
+async def create_comment(post_id: str, comment_data: CommentCreate, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    post = await repo.primary.posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    comment_id = str(uuid.uuid4())
+    comment_id = new_id()
     comment_doc = {
         "id": comment_id,
         "post_id": post_id,
@@ -506,107 +608,87 @@ async def create_comment(post_id: str, comment_data: CommentCreate, current_user
         "username": current_user["username"],
         "user_avatar": current_user.get("avatar", ""),
         "content": comment_data.content,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": timestamp()
     }
     
-    await db.comments.insert_one(comment_doc)
-    await db.posts.update_one({"id": post_id}, {"$inc": {"comments_count": 1}})
+    await repo.primary.comments.insert_one(comment_doc)
+    await repo.primary.posts.update_one({"id": post_id}, {"$inc": {"comments_count": 1}})
     
     # Create notification if not own post
     if post["user_id"] != current_user["id"]:
-        notification_doc = {
-            "id": str(uuid.uuid4()),
-            "user_id": post["user_id"],
-            "type": "comment",
-            "from_user_id": current_user["id"],
-            "from_username": current_user["username"],
-            "post_id": post_id,
-            "read": False,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.notifications.insert_one(notification_doc)
+        await create_notification(repo, post["user_id"], "comment", current_user, post_id)
     
     comment_doc.pop("_id", None)
     return CommentResponse(**comment_doc)
 
 @api_router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
-async def get_comments(post_id: str, skip: int = 0, limit: int = 50):
-    comments = await db.comments.find({"post_id": post_id}, {"_id": 0}).sort("created_at", 1).skip(skip).limit(limit).to_list(limit)
-    return [CommentResponse(**c) for c in comments]
+async def get_comments(post_id: str, skip: int = 0, limit: int = 50, repo: Repository = Depends(get_repo)):
+    comments = await repo.secondary.comments.find({"post_id": post_id}, {"_id": 0}).sort("created_at", 1).skip(skip).limit(limit).to_list(limit)
+    return FastJSONResponse(project_rows(comments, COMMENT_DEFAULTS))
 
 # ==================== SEARCH ROUTES ====================
 
 @api_router.get("/search/posts", response_model=List[PostResponse])
-async def search_posts(q: str = Query(..., min_length=1), skip: int = 0, limit: int = 20, current_user: Optional[dict] = Depends(get_optional_user)):
-    posts = await db.posts.find(
+async def search_posts(q: str = Query(..., min_length=1), skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
+    posts = await repo.search.posts.find(
         {"$or": [
             {"content": {"$regex": q, "$options": "i"}},
             {"hashtags": {"$regex": q, "$options": "i"}},
             {"code_snippet": {"$regex": q, "$options": "i"}}
         ]},
-        {"_id": 0}
+        post_projection(fields)
     ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    result = []
-    for post in posts:
-        is_liked = False
-        if current_user:
-            like = await db.likes.find_one({"post_id": post["id"], "user_id": current_user["id"]})
-            is_liked = like is not None
-        result.append(PostResponse(**post, is_liked=is_liked))
-    
-    return result
+
+    return await post_list_response(repo, posts, current_user, fields)
 
 @api_router.get("/hashtags/{hashtag}/posts", response_model=List[PostResponse])
-async def get_posts_by_hashtag(hashtag: str, skip: int = 0, limit: int = 20, current_user: Optional[dict] = Depends(get_optional_user)):
-    posts = await db.posts.find(
+async def get_posts_by_hashtag(hashtag: str, skip: int = 0, limit: int = 20, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), current_user: Optional[dict] = Depends(get_optional_user), repo: Repository = Depends(get_repo)):
+    fields = parse_fields(fields, PostResponse)
+    posts = await repo.search.posts.find(
         {"hashtags": {"$regex": f"^{hashtag}$", "$options": "i"}},
-        {"_id": 0}
+        post_projection(fields)
     ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    result = []
-    for post in posts:
-        is_liked = False
-        if current_user:
-            like = await db.likes.find_one({"post_id": post["id"], "user_id": current_user["id"]})
-            is_liked = like is not None
-        result.append(PostResponse(**post, is_liked=is_liked))
-    
-    return result
+
+    return await post_list_response(repo, posts, current_user, fields)
 
 @api_router.get("/trending/hashtags")
-async def get_trending_hashtags(limit: int = 10):
+async def get_trending_hashtags(limit: int = 10, repo: Repository = Depends(get_repo)):
     pipeline = [
         {"$unwind": "$hashtags"},
         {"$group": {"_id": "$hashtags", "count": {"$sum": 1}}},
         {"$sort": {"count": -1}},
         {"$limit": limit}
     ]
-    results = await db.posts.aggregate(pipeline).to_list(limit)
+    results = await repo.secondary.posts.aggregate(pipeline).to_list(limit)
     return [{"hashtag": r["_id"], "count": r["count"]} for r in results]
 
 # ==================== NOTIFICATION ROUTES ====================
 
 @api_router.get("/notifications")
-async def get_notifications(skip: int = 0, limit: int = 50, current_user: dict = Depends(get_current_user)):
-    notifications = await db.notifications.find(
+async def get_notifications(skip: int = 0, limit: int = 50, current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    notifications = await repo.primary.notifications.find(
         {"user_id": current_user["id"]},
         {"_id": 0}
     ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    return notifications
+    read_at = current_user.get("notifications_read_at")
+    for notification in notifications:
+        notification["read"] = notification_is_read(notification, read_at)
+    return FastJSONResponse(notifications)
 
 @api_router.post("/notifications/mark-read")
-async def mark_notifications_read(current_user: dict = Depends(get_current_user)):
-    await db.notifications.update_many(
-        {"user_id": current_user["id"], "read": False},
-        {"$set": {"read": True}}
+async def mark_notifications_read(current_user: dict = Depends(get_current_user), repo: Repository = Depends(get_repo)):
+    # Moving the watermark marks everything up to now as read in a single write
+    await repo.primary.users.update_one(
+        {"id": current_user["id"]},
+        {"$set": {"notifications_read_at": timestamp(), "unread_notifications": 0}}
     )
     return {"status": "success"}
 
 @api_router.get("/notifications/unread-count")
 async def get_unread_count(current_user: dict = Depends(get_current_user)):
-    count = await db.notifications.count_documents({"user_id": current_user["id"], "read": False})
-    return {"count": count}
+    # get_current_user already loaded the counter with the user document
+    return {"count": max(0, current_user.get("unread_notifications", 0))}
 
 # ==================== AI ROUTES ====================
 
@@ -628,8 +710,7 @@ Respond with JSON format:
     "suggested_hashtags": ["list", "of", "relevant", "hashtags"]
 }}"""
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        response = await send_ai_message(chat, prompt, "check_content")
         
         # Parse response
         import json
@@ -668,8 +749,7 @@ Provide:
 3. Key concepts used
 4. Common use cases"""
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        response = await send_ai_message(chat, prompt, "explain_code")
         
         return {"explanation": response}
     except Exception as e:
@@ -696,8 +776,7 @@ Provide:
 
 Format your response clearly with sections."""
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        response = await send_ai_message(chat, prompt, "detect_bugs")
         
         return {"analysis": response}
     except Exception as e:
@@ -724,8 +803,7 @@ Respond in JSON format:
     "hashtags": ["hashtag1", "hashtag2", ...]
 }}"""
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        response = await send_ai_message(chat, prompt, "generate_caption")
         
         # Parse response
         import json
@@ -764,8 +842,7 @@ Provide:
 
 Be specific and actionable in your advice."""
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        response = await send_ai_message(chat, prompt, "career_guidance")
         
         return {"guidance": response}
     except Exception as e:
@@ -809,20 +886,66 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
-# Include the router in the main app
-app.include_router(api_router)
-
-# Mount uploads directory
-app.mount("/api/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+@api_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+# ==================== APP FACTORY ====================
+
+async def query_timeout_handler(request, exc):
+    logger.warning(f"Query deadline exceeded on {request.url.path}: {exc}")
+    return FastJSONResponse({"detail": "Query took too long, try a narrower request"}, status_code=503)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker after fork, so every process gets its own client and pool
+    repo: Repository = app.state.repo
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    # A repository handed over already connected (e.g. Repository.in_memory()) is used as is
+    if repo.client is None:
+        repo.connect(event_listeners=[metrics.MongoCommandListener()] if METRICS_ENABLED else [])
+    await repo.warm_up()
+    if ENSURE_INDEXES:
+        await repo.ensure_indexes()
+    else:
+        missing = await repo.missing_indexes()
+        if missing:
+            logger.warning(f"Missing indexes {', '.join(missing)}; run python -m migrations.create_indexes")
+    loop_lag_task = None
+    if METRICS_ENABLED:
+        loop_lag_task = asyncio.create_task(metrics.monitor_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+    logger.info("DevSocial API ready")
+    try:
+        yield
+    finally:
+        if loop_lag_task:
+            loop_lag_task.cancel()
+        repo.close()
+
+def create_app(repo: Optional[Repository] = None) -> FastAPI:
+    """Build the app around `repo`, or a Repository configured from the environment."""
+    app = FastAPI(title="DevSocial API", lifespan=lifespan)
+    app.state.repo = repo if repo is not None else Repository(DataConfig.from_env())
+    app.include_router(api_router)
+
+    # Mount uploads directory; it is created by the lifespan handler
+    app.mount("/api/uploads", StaticFiles(directory=str(UPLOAD_DIR), check_dir=False), name="uploads")
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+    if METRICS_ENABLED:
+        app.add_middleware(metrics.MetricsMiddleware, slow_request_ms=SLOW_REQUEST_MS)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    app.add_exception_handler(ExecutionTimeout, query_timeout_handler)
+    return app
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+# `uvicorn server:app`, or `uvicorn server:create_app --factory`; see gunicorn.conf.py for multi-worker
+app = create_app()
@@ -0,0 +1,174 @@
+"""Storage format for ids and timestamps, converted at the repository boundary.
+
+Handlers and API clients keep seeing 36-char UUID strings and ISO-8601 strings. In
+MongoDB, post/comment/notification ids (and the references to them) are stored as
+16-byte BSON UUIDs, and their `created_at` as native BSON datetimes. New ids are UUIDv7,
+so they are time-ordered and index inserts stay append-mostly.
+
+While migrations.storage_format is converting existing documents, equality filters on
+id fields match both the binary and the legacy string form (STORAGE_LEGACY_READS).
+"""
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from bson.binary import UUID_SUBTYPE, Binary
+
+LEGACY_READS = os.environ.get('STORAGE_LEGACY_READS', 'true').lower() in ('1', 'true', 'yes')
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit millisecond timestamp + random bits."""
+    value = (time.time_ns() // 1_000_000) << 80 | secrets.randbits(80)
+    value &= ~(0xF << 76)
+    value |= 0x7 << 76  # version
+    value &= ~(0x3 << 62)
+    value |= 0x2 << 62  # variant
+    return uuid.UUID(int=value)
+
+def new_id() -> str:
+    return str(uuid7())
+
+def utc_now() -> datetime:
+    """Current UTC time truncated to the millisecond precision of BSON datetimes."""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond - now.microsecond % 1000)
+
+def format_timestamp(value: datetime) -> str:
+    # Fixed width, so a timestamp echoed on write reads back byte-identical
+    return value.isoformat(timespec="microseconds")
+
+def timestamp() -> str:
+    return format_timestamp(utc_now())
+
+def canonical_id(value: str) -> str:
+    """The lowercase hyphenated form of a UUID string, as stored and returned by the API."""
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return value
+
+def _to_uuid(value):
+    # Explicit subtype-4 Binary encodes the same whatever the client's uuidRepresentation
+    if isinstance(value, str):
+        try:
+            return Binary.from_uuid(uuid.UUID(value))
+        except ValueError:
+            return value
+    if isinstance(value, uuid.UUID):
+        return Binary.from_uuid(value)
+    return value
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+class DocumentCodec:
+    """Converts one collection's id and timestamp fields between API and storage form."""
+
+    def __init__(self, id_fields: Iterable[str] = (), datetime_fields: Iterable[str] = (), legacy_reads: bool = LEGACY_READS):
+        self.id_fields = frozenset(id_fields)
+        self.datetime_fields = frozenset(datetime_fields)
+        self.legacy_reads = legacy_reads
+
+    # ---------- writes ----------
+
+    def encode_value(self, field: str, value):
+        if field in self.id_fields:
+            return _to_uuid(value)
+        if field in self.datetime_fields:
+            return _to_datetime(value)
+        return value
+
+    def encode_document(self, doc: dict) -> dict:
+        encoded = dict(doc)
+        for field in self.id_fields | self.datetime_fields:
+            if field in encoded:
+                encoded[field] = self.encode_value(field, encoded[field])
+        return encoded
+
+    def encode_update(self, update: dict) -> dict:
+        encoded = dict(update)
+        for operator in ("$set", "$setOnInsert"):
+            if operator in encoded:
+                encoded[operator] = self.encode_document(encoded[operator])
+        return encoded
+
+    # ---------- reads ----------
+
+    def _id_candidates(self, value) -> list:
+        stored = _to_uuid(value)
+        if self.legacy_reads and stored is not value:
+            # Legacy documents hold the canonical string, whatever form the caller used
+            return [stored, str(stored.as_uuid())]
+        return [stored]
+
+    def _encode_condition(self, field: str, condition):
+        if field in self.id_fields:
+            if isinstance(condition, dict):
+                encoded = {}
+                for operator, operand in condition.items():
+                    if operator in ("$in", "$nin"):
+                        encoded[operator] = [c for v in operand for c in self._id_candidates(v)]
+                    elif operator == "$eq":
+                        encoded["$in"] = self._id_candidates(operand)
+                    elif operator == "$ne":
+                        encoded["$nin"] = self._id_candidates(operand)
+                    else:
+                        encoded[operator] = operand
+                return encoded
+            candidates = self._id_candidates(condition)
+            return candidates[0] if len(candidates) == 1 else {"$in": candidates}
+        if field in self.datetime_fields:
+            if isinstance(condition, dict):
+                return {op: _to_datetime(v) if op in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte") else v
+                        for op, v in condition.items()}
+            return _to_datetime(condition)
+        return condition
+
+    def encode_filter(self, query: Optional[dict]) -> Optional[dict]:
+        if not query:
+            return query
+        encoded = {}
+        for key, value in query.items():
+            if key in ("$or", "$and", "$nor"):
+                encoded[key] = [self.encode_filter(q) for q in value]
+            else:
+                encoded[key] = self._encode_condition(key, value)
+        return encoded
+
+    def decode(self, doc: Optional[dict]) -> Optional[dict]:
+        if doc is None:
+            return None
+        for field in self.id_fields:
+            value = doc.get(field)
+            if isinstance(value, Binary) and value.subtype == UUID_SUBTYPE:
+                value = value.as_uuid()
+            if isinstance(value, uuid.UUID):
+                doc[field] = str(value)
+        for field in self.datetime_fields:
+            value = doc.get(field)
+            if isinstance(value, datetime):
+                if value.tzinfo is None:
+                    # Clients without tz_aware (and mongomock) return naive UTC
+                    value = value.replace(tzinfo=timezone.utc)
+                doc[field] = format_timestamp(value)
+        return doc
+
+CODECS: Dict[str, DocumentCodec] = {
+    "posts": DocumentCodec(id_fields=("id",), datetime_fields=("created_at",)),
+    "comments": DocumentCodec(id_fields=("id", "post_id"), datetime_fields=("created_at",)),
+    "notifications": DocumentCodec(id_fields=("id", "post_id"), datetime_fields=("created_at",)),
+    "likes": DocumentCodec(id_fields=("post_id",)),
+    # Compared against notification timestamps, so stored in the same form
+    "users": DocumentCodec(datetime_fields=("notifications_read_at",)),
+}
+
+def codec_for(collection: str) -> Optional[DocumentCodec]:
+    return CODECS.get(collection)
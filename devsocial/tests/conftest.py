@@ -0,0 +1,38 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server reads its configuration at import time
+os.environ.setdefault("DB_NAME", "devsocial_test")
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+@pytest.fixture
+def repo():
+    from repository import Repository
+    return Repository.in_memory()
+
+@pytest.fixture
+def client(repo):
+    from fastapi.testclient import TestClient
+    import server
+    with TestClient(server.create_app(repo)) as test_client:
+        yield test_client
+
+@pytest.fixture
+def register(client):
+    """Register a user and return its Authorization header."""
+    def _register(username: str) -> dict:
+        response = client.post("/api/auth/register", json={
+            "email": f"{username}@example.com",
+            "username": username,
+            "password": "secret123",
+            "full_name": username.title(),
+        })
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return _register
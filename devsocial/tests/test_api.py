@@ -0,0 +1,79 @@
+import uuid
+
+def test_post_comment_and_like_round_trip(client, register):
+    alice, bob = register("alice"), register("bob")
+
+    response = client.post("/api/posts", json={"content": "Hello #python"}, headers=alice)
+    assert response.status_code == 200, response.text
+    post = response.json()
+    assert uuid.UUID(post["id"]).version == 7
+
+    assert client.post(f"/api/posts/{post['id']}/like", headers=bob).json() == {"status": "liked", "likes_count": 1}
+    response = client.post(f"/api/posts/{post['id']}/comments", json={"content": "Nice"}, headers=bob)
+    assert response.status_code == 200, response.text
+
+    fetched = client.get(f"/api/posts/{post['id']}", headers=bob).json()
+    assert fetched["id"] == post["id"]
+    assert fetched["likes_count"] == 1
+    assert fetched["comments_count"] == 1
+    assert fetched["is_liked"] is True
+
+    comments = client.get(f"/api/posts/{post['id']}/comments").json()
+    assert [c["post_id"] for c in comments] == [post["id"]]
+
+    notifications = client.get("/api/notifications", headers=alice).json()
+    assert [n["type"] for n in notifications] == ["comment", "like"]
+    assert all(n["post_id"] == post["id"] for n in notifications)
+
+def test_created_at_echo_matches_later_reads(client, register):
+    alice = register("alice")
+    post = client.post("/api/posts", json={"content": "Hello"}, headers=alice).json()
+    comment = client.post(f"/api/posts/{post['id']}/comments", json={"content": "Me"}, headers=alice).json()
+
+    assert client.get(f"/api/posts/{post['id']}").json()["created_at"] == post["created_at"]
+    assert client.get(f"/api/posts/{post['id']}/comments").json()[0]["created_at"] == comment["created_at"]
+
+def test_batch_lookup_accepts_non_canonical_ids(client, register):
+    alice = register("alice")
+    post = client.post("/api/posts", json={"content": "Hello"}, headers=alice).json()
+    requested = [post["id"].upper(), post["id"].replace("-", ""), "missing"]
+
+    items = client.post("/api/posts/batch", json={"ids": requested}).json()
+    assert [item["id"] for item in items] == requested
+    assert [item["found"] for item in items] == [True, True, False]
+    assert items[0]["post"]["id"] == post["id"]
+
+def test_batch_lookup_keeps_request_order_and_duplicates(client, register):
+    alice = register("alice")
+    first = client.post("/api/posts", json={"content": "First"}, headers=alice).json()
+    second = client.post("/api/posts", json={"content": "Second"}, headers=alice).json()
+    requested = [second["id"], "missing", first["id"], second["id"]]
+
+    items = client.post("/api/posts/batch", json={"ids": requested}, params={"fields": "content"}).json()
+    assert [item["id"] for item in items] == requested
+    assert [item["post"] and item["post"]["content"] for item in items] == ["Second", None, "First", "Second"]
+    assert items[0]["post"] == {"id": second["id"], "content": "Second"}
+
+def test_users_batch_never_returns_passwords(client, register):
+    register("alice")
+    user_id = client.get("/api/users/username/alice").json()["id"]
+
+    items = client.post("/api/users/batch", json={"ids": [user_id]}).json()
+    assert items[0]["found"] is True
+    assert items[0]["user"]["username"] == "alice"
+    assert "password" not in items[0]["user"]
+
+def test_notification_read_state_follows_the_watermark(client, register):
+    alice, bob = register("alice"), register("bob")
+    post = client.post("/api/posts", json={"content": "Hello"}, headers=alice).json()
+
+    client.post(f"/api/posts/{post['id']}/like", headers=bob)
+    assert client.get("/api/notifications/unread-count", headers=alice).json() == {"count": 1}
+
+    client.post("/api/notifications/mark-read", headers=alice)
+    assert client.get("/api/notifications/unread-count", headers=alice).json() == {"count": 0}
+    assert [n["read"] for n in client.get("/api/notifications", headers=alice).json()] == [True]
+
+    client.post(f"/api/posts/{post['id']}/comments", json={"content": "Nice"}, headers=bob)
+    assert client.get("/api/notifications/unread-count", headers=alice).json() == {"count": 1}
+    assert [n["read"] for n in client.get("/api/notifications", headers=alice).json()] == [False, True]
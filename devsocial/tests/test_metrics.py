@@ -0,0 +1,8 @@
+def test_metrics_report_route_templates(client, register):
+    alice = register("alice")
+    post = client.post("/api/posts", json={"content": "Hello"}, headers=alice).json()
+    client.get(f"/api/posts/{post['id']}")
+
+    body = client.get("/api/metrics").text
+    assert 'devsocial_http_request_duration_seconds_count{method="GET",route="/api/posts/{post_id}",status="200"}' in body
+    assert post["id"] not in body
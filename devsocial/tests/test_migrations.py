@@ -0,0 +1,112 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from bson.binary import Binary
+
+from migrations import notification_watermark, storage_format
+from storage import CODECS, new_id
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["devsocial_test"]
+
+def ts(minute: int) -> str:
+    return f"2024-05-01T10:{minute:02d}:00.000000+00:00"
+
+def read_state(db, user_id: str):
+    user = CODECS["users"].decode(db.users.find_one({"id": user_id}))
+    return user["notifications_read_at"], user["unread_notifications"]
+
+def add_notifications(db, user_id: str, read_flags):
+    db.notifications.insert_many([
+        {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": ts(minute), **({} if read is None else {"read": read})}
+        for minute, read in enumerate(read_flags)
+    ])
+
+def test_watermark_keeps_unread_notifications_unread(db):
+    db.users.insert_many([{"id": "u1"}, {"id": "u2"}, {"id": "u3"}])
+    add_notifications(db, "u1", [True, True, False, True])
+    add_notifications(db, "u2", [True, True])
+
+    assert notification_watermark.migrate(db) == 2
+
+    # Oldest unread is minute 2, so everything from it on stays unread
+    assert read_state(db, "u1") == (ts(1), 2)
+    assert read_state(db, "u2") == (ts(1), 0)
+    assert read_state(db, "u3") == (None, 0)
+
+def test_watermark_recomputes_counters_started_by_the_new_code(db):
+    after_deploy = "2024-05-02T09:00:00.000000+00:00"
+    # u1 got a notification from the deployed code, which incremented the counter but left no
+    # watermark; u2 marked notifications read on the deployed code. Both are in storage form.
+    db.users.insert_many([
+        {"id": "u1", "unread_notifications": 1},
+        CODECS["users"].encode_document({"id": "u2", "notifications_read_at": after_deploy, "unread_notifications": 0}),
+    ])
+    add_notifications(db, "u1", [True, False])
+    add_notifications(db, "u2", [False])
+    db.notifications.insert_one(CODECS["notifications"].encode_document(
+        {"id": new_id(), "user_id": "u1", "type": "like", "created_at": after_deploy}
+    ))
+
+    assert notification_watermark.migrate(db) == 1
+
+    assert read_state(db, "u1") == (ts(0), 2)
+    # Already on the watermark: left alone
+    assert read_state(db, "u2") == (after_deploy, 0)
+
+def test_watermark_compares_legacy_and_native_timestamps_by_time(db):
+    db.users.insert_one({"id": "u1", "unread_notifications": 1})
+    add_notifications(db, "u1", [True, True])
+    # Written by the new code: a BSON datetime, newer than every legacy string
+    db.notifications.insert_one({"id": str(uuid.uuid4()), "user_id": "u1", "created_at": datetime(2024, 5, 2, tzinfo=timezone.utc)})
+
+    notification_watermark.migrate(db)
+
+    assert read_state(db, "u1") == (ts(1), 1)
+
+def test_migrated_watermark_matches_the_unread_increment_filter(db):
+    db.users.insert_one({"id": "u1"})
+    add_notifications(db, "u1", [True])
+
+    notification_watermark.migrate(db)
+
+    assert isinstance(db.users.find_one({"id": "u1"})["notifications_read_at"], datetime)
+    later = (datetime.fromisoformat(ts(0)) + timedelta(minutes=1)).isoformat()
+    # The filter create_notification uses before incrementing the counter
+    query = CODECS["users"].encode_filter({"id": "u1", "$or": [
+        {"notifications_read_at": None},
+        {"notifications_read_at": {"$lt": later}},
+    ]})
+    assert db.users.find_one(query) is not None
+
+def test_storage_format_converts_ids_and_timestamps(db):
+    post_id, comment_id = str(uuid.uuid4()), str(uuid.uuid4())
+    db.posts.insert_one({"id": post_id, "created_at": ts(1)})
+    db.comments.insert_one({"id": comment_id, "post_id": post_id, "created_at": ts(2)})
+    db.likes.insert_one({"user_id": "u1", "post_id": post_id})
+    db.users.insert_one({"id": "u1", "notifications_read_at": ts(3)})
+
+    assert storage_format.migrate(db, dry_run=True)["posts"] == 1
+    converted = storage_format.migrate(db)
+    assert converted["posts"] == converted["comments"] == converted["likes"] == converted["users"] == 1
+
+    post = db.posts.find_one()
+    assert post["id"] == Binary.from_uuid(uuid.UUID(post_id))
+    assert isinstance(post["created_at"], datetime)
+    comment = db.comments.find_one()
+    assert comment["post_id"] == post["id"]
+    assert db.likes.find_one()["post_id"] == post["id"]
+    assert isinstance(db.users.find_one()["notifications_read_at"], datetime)
+
+    # Nothing left, so a re-run is a no-op
+    assert set(storage_format.migrate(db, dry_run=True).values()) == {0}
+    assert set(storage_format.migrate(db).values()) == {0}
+
+def test_storage_format_leaves_unparseable_values(db):
+    db.posts.insert_one({"id": "not-a-uuid", "created_at": "yesterday"})
+
+    assert storage_format.migrate_collection(db, "posts") == 0
+    assert db.posts.find_one({}, {"_id": 0}) == {"id": "not-a-uuid", "created_at": "yesterday"}
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import mongomock
+from bson.binary import Binary
+
+from benchmarks.seed import SeedConfig, generate, write
+
+def test_seed_writes_the_storage_form_unless_legacy():
+    data = generate(SeedConfig(users=20, seed=3))
+    native, legacy = (mongomock.MongoClient()["devsocial_test"] for _ in range(2))
+
+    write(native, data)
+    write(legacy, data, legacy=True)
+
+    assert isinstance(native.posts.find_one()["id"], Binary)
+    assert isinstance(native.notifications.find_one()["created_at"], datetime)
+    assert isinstance(native.users.find_one({"notifications_read_at": {"$ne": None}})["notifications_read_at"], datetime)
+    assert isinstance(legacy.posts.find_one()["id"], str)
+    # Generated documents are left untouched for reuse
+    assert isinstance(data["posts"][0]["id"], str)
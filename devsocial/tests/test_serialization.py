@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from serialization import CompressionMiddleware, mongo_projection, parse_fields, project_rows
+from server import PostResponse
+
+def build_client(body: str, media_type: str = "application/json") -> TestClient:
+    async def endpoint(request):
+        return PlainTextResponse(body, media_type=media_type)
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+def test_large_json_is_gzipped():
+    body = '{"items": [' + ",".join(['"x"'] * 200) + "]}"
+    response = build_client(body).get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.text == body
+
+def test_brotli_is_preferred_when_accepted():
+    pytest.importorskip("brotli")
+    body = '{"items": [' + ",".join(['"x"'] * 200) + "]}"
+    response = build_client(body).get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+def test_small_or_binary_bodies_are_not_compressed():
+    assert "content-encoding" not in build_client("{}").get("/", headers={"Accept-Encoding": "gzip"}).headers
+    response = build_client("x" * 500, media_type="image/png").get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+def test_refused_encoding_is_not_used():
+    body = "x" * 500
+    response = build_client(body, media_type="text/plain").get("/", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in response.headers
+
+def test_parse_fields_always_includes_id():
+    assert parse_fields("content, likes_count", PostResponse) == ("id", "content", "likes_count")
+    assert parse_fields(None, PostResponse) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("content,password", PostResponse)
+    assert exc.value.status_code == 400
+
+def test_unknown_sparse_field_is_rejected(client):
+    response = client.get("/api/posts", params={"fields": "id,password"})
+    assert response.status_code == 400
+
+def test_projection_and_row_defaults():
+    assert mongo_projection(("id", "content")) == {"_id": 0, "id": 1, "content": 1}
+    rows = project_rows([{"id": "1", "content": "x"}], {"id": None, "content": "", "likes_count": 0}, ("id", "likes_count"))
+    assert rows == [{"id": "1", "likes_count": 0}]
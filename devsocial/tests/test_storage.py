@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timezone
+
+from bson.binary import UUID_SUBTYPE, Binary
+
+from storage import CODECS, DocumentCodec, new_id, timestamp
+
+def test_ids_are_stored_as_uuid_binary():
+    post_id = new_id()
+    encoded = CODECS["posts"].encode_document({"id": post_id, "content": "x"})
+    assert isinstance(encoded["id"], Binary)
+    assert encoded["id"].subtype == UUID_SUBTYPE
+    assert encoded["id"].as_uuid() == uuid.UUID(post_id)
+
+def test_decode_accepts_binary_and_native_uuid():
+    post_id = new_id()
+    codec = CODECS["posts"]
+    assert codec.decode({"id": Binary.from_uuid(uuid.UUID(post_id))})["id"] == post_id
+    assert codec.decode({"id": uuid.UUID(post_id)})["id"] == post_id
+
+def test_timestamps_round_trip_at_millisecond_precision():
+    value = timestamp()
+    codec = CODECS["posts"]
+    stored = codec.encode_document({"created_at": value})["created_at"]
+    assert stored.microsecond % 1000 == 0
+    assert codec.decode({"created_at": stored})["created_at"] == value
+
+def test_legacy_candidates_use_the_canonical_string():
+    post_id = new_id()
+    codec = DocumentCodec(id_fields=("id",), legacy_reads=True)
+    condition = codec.encode_filter({"id": post_id.upper()})["id"]
+    assert condition == {"$in": [Binary.from_uuid(uuid.UUID(post_id)), post_id]}
+
+def test_filters_are_encoded_inside_logical_operators():
+    post_id = new_id()
+    stored = Binary.from_uuid(uuid.UUID(post_id))
+    codec = DocumentCodec(id_fields=("id",), datetime_fields=("created_at",), legacy_reads=False)
+    encoded = codec.encode_filter({"$or": [{"id": post_id}, {"id": {"$ne": post_id}}], "created_at": {"$lt": "2024-05-01T10:00:00+00:00"}})
+    assert encoded["$or"] == [{"id": stored}, {"id": {"$nin": [stored]}}]
+    assert encoded["created_at"]["$lt"] == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+def test_unparseable_values_are_left_as_is():
+    codec = CODECS["comments"]
+    assert codec.encode_document({"id": "legacy", "created_at": "yesterday"}) == {"id": "legacy", "created_at": "yesterday"}
+    assert codec.encode_filter({"post_id": "legacy"}) == {"post_id": "legacy"}
+
+def test_naive_datetimes_decode_as_utc():
+    decoded = CODECS["posts"].decode({"created_at": datetime(2024, 5, 1, 10, 0, 0, 123000)})
+    assert decoded["created_at"] == "2024-05-01T10:00:00.123000+00:00"
+
+def test_new_ids_are_time_ordered_uuid7():
+    ids = [new_id() for _ in range(50)]
+    assert all(uuid.UUID(i).version == 7 for i in ids)
+    assert [i[:13] for i in ids] == sorted(i[:13] for i in ids)